@@ -12,11 +12,12 @@ A Slack bot for Pillar VC that helps with:
 - Airtable integration
 """
 
-import os
+import atexit
 import logging
+import queue
 import threading
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
 from slack_bolt import App
 from slack_bolt.adapter.socket_mode import SocketModeHandler
 
@@ -24,91 +25,30 @@ from config import Config
 from handlers import register_commands, register_mentions, register_events
 from handlers.events import register_view_handlers
 from database import init_db
-from services import GoogleService
-
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+from utils import SlackUtils, create_web_client
+
+# Set up logging: handler threads only enqueue records, and a single
+# listener thread does the (blocking) write to stderr
+_log_queue = queue.SimpleQueue()
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(
+    logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 )
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter("%(message)s"))
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
+_log_listener = QueueListener(_log_queue, _stream_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
 logger = logging.getLogger(__name__)
 
 
-def get_oauth_redirect_uri():
-    """Get the OAuth redirect URI based on environment."""
-    base_url = os.environ.get("BASE_URL", "http://localhost:8080")
-    return f"{base_url}/oauth/callback"
-
-
-class OAuthCallbackHandler(BaseHTTPRequestHandler):
-    """Handle Google OAuth callbacks."""
-
-    def do_GET(self):
-        """Handle GET requests for OAuth callback."""
-        parsed = urlparse(self.path)
-
-        if parsed.path == "/oauth/callback":
-            query_params = parse_qs(parsed.query)
-            code = query_params.get("code", [None])[0]
-            state = query_params.get("state", [None])[0]  # user_id
-
-            if code and state:
-                google_service = GoogleService()
-                success = google_service.handle_oauth_callback(
-                    user_id=state,
-                    code=code,
-                    redirect_uri=get_oauth_redirect_uri()
-                )
-
-                if success:
-                    self.send_response(200)
-                    self.send_header("Content-type", "text/html")
-                    self.end_headers()
-                    self.wfile.write(b"""
-                        <html>
-                        <head><title>Success</title></head>
-                        <body style="font-family: sans-serif; text-align: center; padding-top: 50px;">
-                            <h1>Google Account Connected!</h1>
-                            <p>You can close this window and return to Slack.</p>
-                            <p>Try running <code>/pillar agenda finalize</code> again.</p>
-                        </body>
-                        </html>
-                    """)
-                else:
-                    self.send_response(500)
-                    self.send_header("Content-type", "text/html")
-                    self.end_headers()
-                    self.wfile.write(b"""
-                        <html>
-                        <head><title>Error</title></head>
-                        <body style="font-family: sans-serif; text-align: center; padding-top: 50px;">
-                            <h1>Connection Failed</h1>
-                            <p>There was an error connecting your Google account.</p>
-                            <p>Please try again from Slack.</p>
-                        </body>
-                        </html>
-                    """)
-            else:
-                self.send_response(400)
-                self.send_header("Content-type", "text/plain")
-                self.end_headers()
-                self.wfile.write(b"Missing code or state parameter")
-        else:
-            self.send_response(404)
-            self.send_header("Content-type", "text/plain")
-            self.end_headers()
-            self.wfile.write(b"Not found")
-
-    def log_message(self, format, *args):
-        """Suppress default HTTP logging."""
-        logger.debug(f"OAuth server: {args[0]}")
-
-
-def start_oauth_server():
-    """Start the OAuth callback HTTP server."""
-    server = HTTPServer(("localhost", 8080), OAuthCallbackHandler)
-    logger.info("OAuth callback server running on http://localhost:8080")
-    server.serve_forever()
+# Bolt's default listener pool has 5 threads. Agent sessions hold a thread for
+# the whole Claude/tool loop (often tens of seconds) while mostly waiting on
+# the network, so a few concurrent mentions would otherwise queue every other
+# event and command behind them.
+LISTENER_WORKERS = 16
 
 
 def create_app() -> App:
@@ -117,9 +57,13 @@ def create_app() -> App:
     Config.validate()
 
     # Initialize the app
+    # Bolt copies this client's retry handlers onto every per-request client
     app = App(
-        token=Config.SLACK_BOT_TOKEN,
+        client=create_web_client(Config.SLACK_BOT_TOKEN),
         signing_secret=Config.SLACK_SIGNING_SECRET,
+        listener_executor=ThreadPoolExecutor(
+            max_workers=LISTENER_WORKERS, thread_name_prefix="bolt-listener"
+        ),
     )
 
     # Initialize database
@@ -140,12 +84,16 @@ def main():
     """Run the bot using Socket Mode."""
     app = create_app()
 
-    # Start OAuth callback server in background thread
-    if Config.GOOGLE_CLIENT_ID and Config.GOOGLE_CLIENT_SECRET:
-        oauth_thread = threading.Thread(target=start_oauth_server, daemon=True)
-        oauth_thread.start()
-    else:
-        logger.info("Google OAuth not configured - skipping OAuth server")
+    # The Google OAuth callback server is started on demand by the first
+    # command that needs a Google auth link (see oauth_server.ensure_oauth_server)
+    if not (Config.GOOGLE_CLIENT_ID and Config.GOOGLE_CLIENT_SECRET):
+        logger.info("Google OAuth not configured - OAuth server disabled")
+
+    # Warm channel names in the background so member_joined welcomes
+    # can skip conversations.info for channels that aren't portfolio channels
+    threading.Thread(
+        target=SlackUtils(app.client).preload_channel_names, daemon=True
+    ).start()
 
     # Use Socket Mode for easier development and deployment
     # No need to expose a public URL
@@ -1,48 +1,80 @@
 import os
+import functools
+from dataclasses import dataclass
+from typing import Optional
 from dotenv import load_dotenv
 
-load_dotenv()
 
+@functools.cache
+def _load_dotenv_once() -> bool:
+    """Parse the .env file a single time per process."""
+    load_dotenv()
+    return True
 
-class Config:
+
+@dataclass(frozen=True, slots=True)
+class Settings:
     # Slack
-    SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN")
-    SLACK_APP_TOKEN = os.getenv("SLACK_APP_TOKEN")
-    SLACK_SIGNING_SECRET = os.getenv("SLACK_SIGNING_SECRET")
+    SLACK_BOT_TOKEN: Optional[str]
+    SLACK_APP_TOKEN: Optional[str]
+    SLACK_SIGNING_SECRET: Optional[str]
 
     # Anthropic
-    ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
+    ANTHROPIC_API_KEY: Optional[str]
 
     # Tavily (web search)
-    TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
+    TAVILY_API_KEY: Optional[str]
 
     # Google
-    GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
-    GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
+    GOOGLE_CLIENT_ID: Optional[str]
+    GOOGLE_CLIENT_SECRET: Optional[str]
 
     # Airtable
-    AIRTABLE_API_KEY = os.getenv("AIRTABLE_API_KEY")
-    AIRTABLE_BASE_ID = os.getenv("AIRTABLE_BASE_ID")
+    AIRTABLE_API_KEY: Optional[str]
+    AIRTABLE_BASE_ID: Optional[str]
 
     # App settings
-    PORTFOLIO_CHANNEL_PREFIX = os.getenv("PORTFOLIO_CHANNEL_PREFIX", "portfolio-")
-    DEFAULT_SUMMARY_HOURS = 24
-    MAX_MESSAGES_TO_FETCH = 500
+    PORTFOLIO_CHANNEL_PREFIX: str = "portfolio-"
+    DEFAULT_SUMMARY_HOURS: int = 24
+    MAX_MESSAGES_TO_FETCH: int = 500
+
+    # Base URL for OAuth callbacks
+    BASE_URL: str = "http://localhost:8080"
 
     @classmethod
-    def validate(cls):
-        """Validate that required config values are set."""
-        # Debug: print what we see
-        print(f"DEBUG: SLACK_BOT_TOKEN set: {bool(cls.SLACK_BOT_TOKEN)}")
-        print(f"DEBUG: SLACK_APP_TOKEN set: {bool(cls.SLACK_APP_TOKEN)}")
-        print(f"DEBUG: ANTHROPIC_API_KEY set: {bool(cls.ANTHROPIC_API_KEY)}")
-        print(f"DEBUG: All env vars: {[k for k in os.environ.keys() if 'SLACK' in k or 'ANTHROPIC' in k]}")
+    def from_env(cls) -> "Settings":
+        """Build the settings from the environment (and .env, if present)."""
+        _load_dotenv_once()
+        return cls(
+            SLACK_BOT_TOKEN=os.getenv("SLACK_BOT_TOKEN"),
+            SLACK_APP_TOKEN=os.getenv("SLACK_APP_TOKEN"),
+            SLACK_SIGNING_SECRET=os.getenv("SLACK_SIGNING_SECRET"),
+            ANTHROPIC_API_KEY=os.getenv("ANTHROPIC_API_KEY"),
+            TAVILY_API_KEY=os.getenv("TAVILY_API_KEY"),
+            GOOGLE_CLIENT_ID=os.getenv("GOOGLE_CLIENT_ID"),
+            GOOGLE_CLIENT_SECRET=os.getenv("GOOGLE_CLIENT_SECRET"),
+            AIRTABLE_API_KEY=os.getenv("AIRTABLE_API_KEY"),
+            AIRTABLE_BASE_ID=os.getenv("AIRTABLE_BASE_ID"),
+            PORTFOLIO_CHANNEL_PREFIX=os.getenv("PORTFOLIO_CHANNEL_PREFIX", "portfolio-"),
+            BASE_URL=os.getenv("BASE_URL", "http://localhost:8080"),
+        )
+
+    @property
+    def OAUTH_REDIRECT_URI(self) -> str:
+        """OAuth redirect URI based on environment."""
+        return f"{self.BASE_URL}/oauth/callback"
 
+    def validate(self):
+        """Validate that required config values are set."""
         required = [
-            ("SLACK_BOT_TOKEN", cls.SLACK_BOT_TOKEN),
-            ("SLACK_APP_TOKEN", cls.SLACK_APP_TOKEN),
-            ("ANTHROPIC_API_KEY", cls.ANTHROPIC_API_KEY),
+            ("SLACK_BOT_TOKEN", self.SLACK_BOT_TOKEN),
+            ("SLACK_APP_TOKEN", self.SLACK_APP_TOKEN),
+            ("ANTHROPIC_API_KEY", self.ANTHROPIC_API_KEY),
         ]
         missing = [name for name, value in required if not value]
         if missing:
             raise ValueError(f"Missing required environment variables: {', '.join(missing)}")
+
+
+# Resolved once at import; every module shares this instance via the module cache
+Config = Settings.from_env()
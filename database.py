@@ -1,201 +1,306 @@
 import sqlite3
 import json
 import os
+import queue
+import time
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple, Iterator
 
 # Use DATA_DIR env var for persistent storage (Railway volumes), fallback to local
 DATA_DIR = Path(os.environ.get("DATA_DIR", Path(__file__).parent))
 DB_PATH = DATA_DIR / "pillar_bot.db"
 
+# Bump whenever init_db's schema changes so existing databases are upgraded
+SCHEMA_VERSION = 1
 
-def get_connection():
-    """Get a database connection."""
-    conn = sqlite3.connect(DB_PATH)
+# How often each connection re-runs PRAGMA optimize
+OPTIMIZE_INTERVAL_SECONDS = 60 * 60
+
+# Cached summaries are keyed to the minute they were requested, so older rows
+# are never read again; writes prune anything past this age
+SUMMARY_CACHE_MAX_AGE_SECONDS = 24 * 60 * 60
+
+# Older SQLite builds cap bound parameters per statement at 999
+_MAX_SQL_PARAMS = 900
+
+
+# Idle connections kept for reuse; roughly Bolt's listener pool plus our own
+# worker pools. Checkouts beyond this open a fresh connection that is closed
+# instead of returned.
+POOL_SIZE = 10
+
+
+class _PooledConnection(sqlite3.Connection):
+    """Connection that remembers when it last ran PRAGMA optimize."""
+    optimized_at = 0.0
+
+
+_pool: "queue.LifoQueue[_PooledConnection]" = queue.LifoQueue(maxsize=POOL_SIZE)
+
+
+def _open_connection() -> _PooledConnection:
+    """Open and tune a new connection for the pool."""
+    conn = sqlite3.connect(DB_PATH, factory=_PooledConnection, check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    # Per-connection tuning: fewer fsyncs under WAL, larger page cache, mmap reads
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-20000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.optimized_at = time.monotonic()
     return conn
 
 
+@contextmanager
+def connection() -> Iterator[sqlite3.Connection]:
+    """Check a connection out of the pool for the duration of the block."""
+    try:
+        conn = _pool.get_nowait()
+    except queue.Empty:
+        conn = _open_connection()
+
+    if time.monotonic() - conn.optimized_at > OPTIMIZE_INTERVAL_SECONDS:
+        # Runs on a connection that has been issuing queries, which is what
+        # SQLite uses to decide which tables are worth re-analyzing
+        conn.execute("PRAGMA optimize")
+        conn.optimized_at = time.monotonic()
+
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            _pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+def _schema_version_ok() -> bool:
+    """Check whether the database was already initialized at the current schema."""
+    with connection() as conn:
+        row = conn.execute("PRAGMA user_version").fetchone()
+    return row[0] >= SCHEMA_VERSION
+
+
 def init_db():
     """Initialize the database with required tables."""
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    # Store user preferences and settings
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS user_settings (
-            user_id TEXT PRIMARY KEY,
-            settings TEXT DEFAULT '{}',
-            last_active TIMESTAMP,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-
-    # Store Google OAuth tokens
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS google_tokens (
-            user_id TEXT PRIMARY KEY,
-            access_token TEXT,
-            refresh_token TEXT,
-            token_expiry TIMESTAMP,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
-
-    # Store agenda items for Monday meetings
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS agenda_items (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id TEXT,
-            channel_id TEXT,
-            category TEXT,
-            content TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            included_in_doc INTEGER DEFAULT 0
-        )
-    """)
-
-    # Cache channel summaries to avoid re-processing
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS summary_cache (
-            channel_id TEXT,
-            period_start TIMESTAMP,
-            period_end TIMESTAMP,
-            summary TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            PRIMARY KEY (channel_id, period_start, period_end)
-        )
-    """)
-
-    conn.commit()
-    conn.close()
+    if DB_PATH.exists() and _schema_version_ok():
+        return
+
+    with connection() as conn:
+        cursor = conn.cursor()
+
+        # WAL is persistent in the database file, so setting it once here is enough
+        cursor.execute("PRAGMA journal_mode=WAL")
+
+        # Store user preferences and settings
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS user_settings (
+                user_id TEXT PRIMARY KEY,
+                settings TEXT DEFAULT '{}',
+                last_active TIMESTAMP,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        # Store Google OAuth tokens
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS google_tokens (
+                user_id TEXT PRIMARY KEY,
+                access_token TEXT,
+                refresh_token TEXT,
+                token_expiry TIMESTAMP,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+        # Store agenda items for Monday meetings
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS agenda_items (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT,
+                channel_id TEXT,
+                category TEXT,
+                content TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                included_in_doc INTEGER DEFAULT 0
+            )
+        """)
+
+        # Cache channel summaries to avoid re-processing
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS summary_cache (
+                channel_id TEXT,
+                period_start TIMESTAMP,
+                period_end TIMESTAMP,
+                summary TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (channel_id, period_start, period_end)
+            )
+        """)
+
+        # Serves get_pending_agenda_items' filter and ORDER BY without a sort step.
+        # summary_cache lookups are already covered by its primary key.
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_agenda_pending
+            ON agenda_items (included_in_doc, category, created_at)
+        """)
+
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
 
 
 def save_user_last_active(user_id: str):
     """Update user's last active timestamp."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO user_settings (user_id, last_active)
-        VALUES (?, ?)
-        ON CONFLICT(user_id) DO UPDATE SET last_active = ?
-    """, (user_id, datetime.now(), datetime.now()))
-    conn.commit()
-    conn.close()
+    now = datetime.now().isoformat(sep=" ")
+    with connection() as conn:
+        with conn:
+            conn.execute("""
+                INSERT INTO user_settings (user_id, last_active)
+                VALUES (?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET last_active = excluded.last_active
+            """, (user_id, now))
+
+
+def save_users_last_active(last_active: Dict[str, datetime]):
+    """Update many users' last active timestamps in one transaction."""
+    rows = [(user_id, ts.isoformat(sep=" ")) for user_id, ts in last_active.items()]
+    with connection() as conn:
+        with conn:
+            # The batch can land after a newer direct write; keep the later time.
+            # ISO timestamps compare correctly as text, and MAX skips a NULL.
+            conn.executemany("""
+                INSERT INTO user_settings (user_id, last_active)
+                VALUES (?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    last_active = MAX(COALESCE(last_active, ''), excluded.last_active)
+            """, rows)
 
 
 def get_user_last_active(user_id: str) -> Optional[datetime]:
     """Get user's last active timestamp for catch-up feature."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT last_active FROM user_settings WHERE user_id = ?", (user_id,))
-    row = cursor.fetchone()
-    conn.close()
-    if row and row["last_active"]:
-        return datetime.fromisoformat(row["last_active"])
-    return None
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT last_active FROM user_settings WHERE user_id = ?", (user_id,))
+        row = cursor.fetchone()
+        if row and row["last_active"]:
+            return datetime.fromisoformat(row["last_active"])
+        return None
 
 
 def save_google_token(user_id: str, access_token: str, refresh_token: str, expiry: datetime):
     """Save Google OAuth token for a user."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO google_tokens (user_id, access_token, refresh_token, token_expiry)
-        VALUES (?, ?, ?, ?)
-        ON CONFLICT(user_id) DO UPDATE SET
-            access_token = ?,
-            refresh_token = ?,
-            token_expiry = ?
-    """, (user_id, access_token, refresh_token, expiry,
-          access_token, refresh_token, expiry))
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        with conn:
+            conn.execute("""
+                INSERT INTO google_tokens (user_id, access_token, refresh_token, token_expiry)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    access_token = ?,
+                    refresh_token = ?,
+                    token_expiry = ?
+            """, (user_id, access_token, refresh_token, expiry,
+                  access_token, refresh_token, expiry))
 
 
 def get_google_token(user_id: str) -> Optional[Dict]:
     """Get Google OAuth token for a user."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT access_token, refresh_token, token_expiry
-        FROM google_tokens WHERE user_id = ?
-    """, (user_id,))
-    row = cursor.fetchone()
-    conn.close()
-    if row:
-        return {
-            "access_token": row["access_token"],
-            "refresh_token": row["refresh_token"],
-            "token_expiry": row["token_expiry"]
-        }
-    return None
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT access_token, refresh_token, token_expiry
+            FROM google_tokens WHERE user_id = ?
+        """, (user_id,))
+        row = cursor.fetchone()
+        if row:
+            return {
+                "access_token": row["access_token"],
+                "refresh_token": row["refresh_token"],
+                "token_expiry": row["token_expiry"]
+            }
+        return None
 
 
 def add_agenda_item(user_id: str, channel_id: str, category: str, content: str):
     """Add an item to the Monday meeting agenda."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO agenda_items (user_id, channel_id, category, content)
-        VALUES (?, ?, ?, ?)
-    """, (user_id, channel_id, category, content))
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        with conn:
+            conn.execute("""
+                INSERT INTO agenda_items (user_id, channel_id, category, content)
+                VALUES (?, ?, ?, ?)
+            """, (user_id, channel_id, category, content))
 
 
 def get_pending_agenda_items() -> List[Dict]:
     """Get all agenda items not yet included in a doc."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT id, user_id, channel_id, category, content, created_at
-        FROM agenda_items WHERE included_in_doc = 0
-        ORDER BY category, created_at
-    """)
-    rows = cursor.fetchall()
-    conn.close()
-    return [dict(row) for row in rows]
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, user_id, channel_id, category, content, created_at
+            FROM agenda_items WHERE included_in_doc = 0
+            ORDER BY category, created_at
+        """)
+        rows = cursor.fetchall()
+        return [dict(row) for row in rows]
+
+
+def get_pending_agenda_by_category() -> List[Tuple[str, List[str]]]:
+    """Get pending agenda item contents grouped by category, oldest first."""
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT category, json_group_array(content) AS contents
+            FROM (
+                SELECT category, content FROM agenda_items
+                WHERE included_in_doc = 0
+                ORDER BY category, created_at
+            )
+            GROUP BY category
+            ORDER BY category
+        """)
+        rows = cursor.fetchall()
+        return [(row["category"], json.loads(row["contents"])) for row in rows]
 
 
 def mark_agenda_items_included(item_ids: List[int]):
     """Mark agenda items as included in a doc."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.executemany(
-        "UPDATE agenda_items SET included_in_doc = 1 WHERE id = ?",
-        [(item_id,) for item_id in item_ids]
-    )
-    conn.commit()
-    conn.close()
+    with connection() as conn:
+        with conn:
+            # One statement per chunk, kept under SQLite's bound-parameter limit
+            for start in range(0, len(item_ids), _MAX_SQL_PARAMS):
+                chunk = item_ids[start:start + _MAX_SQL_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                conn.execute(
+                    f"UPDATE agenda_items SET included_in_doc = 1 WHERE id IN ({placeholders})",
+                    chunk
+                )
 
 
 def cache_summary(channel_id: str, period_start: datetime, period_end: datetime, summary: str):
-    """Cache a channel summary."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT OR REPLACE INTO summary_cache
-        (channel_id, period_start, period_end, summary)
-        VALUES (?, ?, ?, ?)
-    """, (channel_id, period_start, period_end, summary))
-    conn.commit()
-    conn.close()
+    """Cache a channel summary, dropping ones too old to be looked up again."""
+    with connection() as conn:
+        with conn:
+            conn.execute(
+                "DELETE FROM summary_cache WHERE created_at < datetime('now', ?)",
+                (f"-{SUMMARY_CACHE_MAX_AGE_SECONDS} seconds",)
+            )
+            conn.execute("""
+                INSERT OR REPLACE INTO summary_cache
+                (channel_id, period_start, period_end, summary)
+                VALUES (?, ?, ?, ?)
+            """, (channel_id, period_start, period_end, summary))
 
 
 def get_cached_summary(channel_id: str, period_start: datetime, period_end: datetime) -> Optional[str]:
     """Get a cached summary if it exists."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT summary FROM summary_cache
-        WHERE channel_id = ? AND period_start = ? AND period_end = ?
-    """, (channel_id, period_start, period_end))
-    row = cursor.fetchone()
-    conn.close()
-    return row["summary"] if row else None
-
-
-# Initialize database on import
-init_db()
+    with connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT summary FROM summary_cache
+            WHERE channel_id = ? AND period_start = ? AND period_end = ?
+        """, (channel_id, period_start, period_end))
+        row = cursor.fetchone()
+        return row["summary"] if row else None
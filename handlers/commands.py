@@ -1,28 +1,54 @@
-import os
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from typing import TYPE_CHECKING
 from slack_bolt import App
 
-from services import ClaudeService, GoogleService, AirtableService
-
-
-def get_oauth_redirect_uri():
-    """Get the OAuth redirect URI based on environment."""
-    base_url = os.environ.get("BASE_URL", "http://localhost:8080")
-    return f"{base_url}/oauth/callback"
+from config import Config
+from oauth_server import ensure_oauth_server
 from utils import SlackUtils, MessageFormatter
 from database import (
-    add_agenda_item, get_pending_agenda_items, mark_agenda_items_included,
-    save_user_last_active, get_user_last_active
+    add_agenda_item, get_pending_agenda_items, get_pending_agenda_by_category, mark_agenda_items_included,
+    save_user_last_active, get_user_last_active, cache_summary, get_cached_summary
 )
 
+if TYPE_CHECKING:
+    from services import ClaudeService, GoogleService, AirtableService
+
+# Concurrent per-company workers when drafting an LP letter
+LP_LETTER_WORKERS = 8
+
 
 def register_commands(app: App):
     """Register all slash command handlers."""
+    # Imported here so loading this module doesn't pull in the service SDKs
+    from services import ClaudeService, GoogleService, AirtableService
 
     claude = ClaudeService()
     google = GoogleService()
     airtable = AirtableService()
 
+    # Built once: each entry adapts the common (respond, client, user_id,
+    # channel_id, args) call to the handler's own signature, so SlackUtils is
+    # only constructed for subcommands that talk to Slack
+    dispatch = {
+        "summarize": lambda respond, client, user_id, channel_id, args: handle_summarize(
+            respond, SlackUtils(client), claude, channel_id, args, user_id),
+        "catchup": lambda respond, client, user_id, channel_id, args: handle_catchup(
+            respond, SlackUtils(client), claude, channel_id, user_id),
+        "actions": lambda respond, client, user_id, channel_id, args: handle_actions(
+            respond, SlackUtils(client), claude, channel_id, args),
+        "agenda": lambda respond, client, user_id, channel_id, args: handle_agenda(
+            respond, SlackUtils(client), claude, google, channel_id, user_id, args),
+        "portfolio": lambda respond, client, user_id, channel_id, args: handle_portfolio(
+            respond, SlackUtils(client), claude, airtable, args),
+        "lp-letter": lambda respond, client, user_id, channel_id, args: handle_lp_letter(
+            respond, SlackUtils(client), claude, google, airtable, user_id, args),
+        "help": lambda respond, client, user_id, channel_id, args: respond(
+            **MessageFormatter.format_help()),
+    }
+
     @app.command("/pillar")
     def handle_pillar_command(ack, command, client, respond):
         """Main command handler for /pillar."""
@@ -32,32 +58,29 @@ def register_commands(app: App):
         channel_id = command["channel_id"]
         text = command.get("text", "").strip()
 
-        slack_utils = SlackUtils(client)
-
         # Parse the command
         parts = text.split(maxsplit=1)
         subcommand = parts[0].lower() if parts else "help"
         args = parts[1] if len(parts) > 1 else ""
 
         # Route to appropriate handler
-        if subcommand == "summarize":
-            handle_summarize(respond, slack_utils, claude, channel_id, args, user_id)
-        elif subcommand == "catchup":
-            handle_catchup(respond, slack_utils, claude, channel_id, user_id)
-        elif subcommand == "actions":
-            handle_actions(respond, slack_utils, claude, channel_id, args)
-        elif subcommand == "agenda":
-            handle_agenda(respond, slack_utils, claude, google, channel_id, user_id, args)
-        elif subcommand == "portfolio":
-            handle_portfolio(respond, slack_utils, claude, airtable, args)
-        elif subcommand == "lp-letter":
-            handle_lp_letter(respond, slack_utils, claude, google, airtable, user_id, args)
-        elif subcommand == "help":
-            respond(**MessageFormatter.format_help())
-        else:
+        handler = dispatch.get(subcommand)
+        if handler is None:
             respond(**MessageFormatter.format_error(
                 f"Unknown command: `{subcommand}`. Use `/pillar help` for available commands."
             ))
+            return
+
+        handler(respond, client, user_id, channel_id, args)
+
+
+def _summary_window(hours: int):
+    """Get a (start, end) window ending at the current minute.
+
+    Quantizing to the minute lets repeated requests share a summary_cache key.
+    """
+    period_end = datetime.now().replace(second=0, microsecond=0)
+    return period_end - timedelta(hours=hours), period_end
 
 
 def handle_summarize(respond, slack_utils: SlackUtils, claude: ClaudeService,
@@ -79,19 +102,25 @@ def handle_summarize(respond, slack_utils: SlackUtils, claude: ClaudeService,
     else:
         period = f"last {hours // 168} weeks"
 
-    # Fetch messages
-    messages = slack_utils.get_channel_history(channel_id, hours=hours)
+    # Reuse a summary of the same window if one was generated this minute
+    period_start, period_end = _summary_window(hours)
+    summary = get_cached_summary(channel_id, period_start, period_end)
 
-    if not messages:
-        respond(**MessageFormatter.format_error("No messages found in the specified time period."))
-        return
+    if summary is None:
+        # Fetch messages
+        messages = slack_utils.get_channel_history(channel_id, since=period_start)
+
+        if not messages:
+            respond(**MessageFormatter.format_error("No messages found in the specified time period."))
+            return
+
+        # Generate summary
+        summary = claude.summarize_messages(messages)
+        cache_summary(channel_id, period_start, period_end, summary)
 
     # Get channel name
     channel_name = slack_utils.get_channel_name(channel_id)
 
-    # Generate summary
-    summary = claude.summarize_messages(messages)
-
     # Update user's last active time
     save_user_last_active(user_id)
 
@@ -119,23 +148,30 @@ def handle_catchup(respond, slack_utils: SlackUtils, claude: ClaudeService,
 
     respond(**MessageFormatter.format_loading("Preparing your catch-up"))
 
-    # Fetch messages
-    messages = slack_utils.get_channel_history(channel_id, hours=hours)
+    # Catch-ups use a different prompt, so they get their own cache key
+    period_start, period_end = _summary_window(hours)
+    cache_key = f"{channel_id}:catchup"
+    summary = get_cached_summary(cache_key, period_start, period_end)
 
-    if not messages:
-        respond(text="You're all caught up! No new messages since your last visit.")
-        return
+    if summary is None:
+        # Fetch messages
+        messages = slack_utils.get_channel_history(channel_id, since=period_start)
+
+        if not messages:
+            respond(text="You're all caught up! No new messages since your last visit.")
+            return
+
+        # Generate summary with catch-up context
+        summary = claude.summarize_messages(
+            messages,
+            context="This is a personal catch-up for a team member who has been away. "
+                    "Focus on decisions made, action items that might involve them, and important updates."
+        )
+        cache_summary(cache_key, period_start, period_end, summary)
 
     # Get channel name
     channel_name = slack_utils.get_channel_name(channel_id)
 
-    # Generate summary with catch-up context
-    summary = claude.summarize_messages(
-        messages,
-        context="This is a personal catch-up for a team member who has been away. "
-                "Focus on decisions made, action items that might involve them, and important updates."
-    )
-
     # Update last active
     save_user_last_active(user_id)
 
@@ -214,7 +250,8 @@ def handle_agenda(respond, slack_utils: SlackUtils, claude: ClaudeService,
 
         # Check Google auth
         if not google.is_user_authenticated(user_id):
-            auth_url = google.get_auth_url(user_id, get_oauth_redirect_uri())
+            ensure_oauth_server()
+            auth_url = google.get_auth_url(user_id, Config.OAUTH_REDIRECT_URI)
             respond(**MessageFormatter.format_google_auth_prompt(auth_url))
             return
 
@@ -239,28 +276,19 @@ def handle_agenda(respond, slack_utils: SlackUtils, claude: ClaudeService,
             respond(**MessageFormatter.format_error("Failed to create Google Doc. Please check your Google connection."))
 
     elif subcommand == "view":
-        # View current pending items
-        items = get_pending_agenda_items()
-        if not items:
+        # View current pending items, already grouped by SQLite
+        by_category = get_pending_agenda_by_category()
+        if not by_category:
             respond(text="No pending agenda items. Add items with `/pillar agenda add`")
             return
 
-        # Group by category
-        by_category = {}
-        for item in items:
-            cat = item["category"]
-            if cat not in by_category:
-                by_category[cat] = []
-            by_category[cat].append(item["content"])
-
-        text = "*Pending Agenda Items:*\n\n"
-        for category, contents in by_category.items():
-            text += f"*{category}*\n"
-            for content in contents:
-                text += f"  - {content}\n"
-            text += "\n"
+        parts = ["*Pending Agenda Items:*\n"]
+        for category, contents in by_category:
+            parts.append(f"*{category}*")
+            parts.extend(f"  - {content}" for content in contents)
+            parts.append("")
 
-        respond(text=text)
+        respond(text="\n".join(parts))
 
     else:
         # Show the agenda builder prompt
@@ -306,11 +334,11 @@ def handle_portfolio(respond, slack_utils: SlackUtils, claude: ClaudeService,
         airtable_data = airtable.get_portfolio_company(company_name)
 
     # Find the company's Slack channel
-    channel_name = f"portfolio-{company_name.lower().replace(' ', '-')}"
+    channel_name = SlackUtils.portfolio_channel_name(company_name)
     channel_id = slack_utils.get_channel_id_by_name(channel_name)
 
     if not channel_id and airtable_data:
-        # Try to get channel from Airtable
+        # Not named by convention; Airtable may record the actual channel
         alt_channel = airtable.get_company_slack_channel(company_name)
         if alt_channel:
             channel_id = slack_utils.get_channel_id_by_name(alt_channel)
@@ -348,7 +376,8 @@ def handle_lp_letter(respond, slack_utils: SlackUtils, claude: ClaudeService,
 
     # Check Google auth
     if not google.is_user_authenticated(user_id):
-        auth_url = google.get_auth_url(user_id, get_oauth_redirect_uri())
+        ensure_oauth_server()
+        auth_url = google.get_auth_url(user_id, Config.OAUTH_REDIRECT_URI)
         respond(**MessageFormatter.format_google_auth_prompt(auth_url))
         return
 
@@ -359,28 +388,51 @@ def handle_lp_letter(respond, slack_utils: SlackUtils, claude: ClaudeService,
         respond(**MessageFormatter.format_error("No portfolio channels found. Cannot generate LP letter."))
         return
 
-    # Gather updates from each company
-    portfolio_updates = {}
+    # Gather updates from each company concurrently - each one is a Slack
+    # history fetch, an Airtable lookup and two Claude calls, all network-bound
+    since = datetime.now() - timedelta(days=90)  # Last ~quarter
 
-    for channel in portfolio_channels[:20]:  # Limit to 20 companies
-        messages = slack_utils.get_channel_history(channel["id"], hours=24*90)  # Last ~quarter
+    def process_company(channel):
+        messages = slack_utils.get_channel_history(channel["id"], since=since)
+        if not messages:
+            return channel["company_name"], None
 
-        if messages:
-            # Get Airtable data if available
-            airtable_data = None
-            if airtable.is_configured():
-                airtable_data = airtable.get_portfolio_company(channel["company_name"])
-
-            # Generate update for this company
-            update = claude.generate_portfolio_update(
-                channel["company_name"],
-                messages,
-                airtable_data
-            )
-
-            # Convert to LP letter style
-            lp_section = claude.generate_lp_letter_section(channel["company_name"], update)
-            portfolio_updates[channel["company_name"]] = lp_section
+        # Get Airtable data if available
+        airtable_data = None
+        if airtable.is_configured():
+            airtable_data = airtable.get_portfolio_company(channel["company_name"])
+
+        # Generate update for this company
+        update = claude.generate_portfolio_update(
+            channel["company_name"],
+            messages,
+            airtable_data
+        )
+
+        # Convert to LP letter style
+        return channel["company_name"], claude.generate_lp_letter_section(channel["company_name"], update)
+
+    with ThreadPoolExecutor(max_workers=LP_LETTER_WORKERS) as executor:
+        # One paginated listing fills the per-company cache, so the lookups in
+        # process_company don't each run their own formula query
+        companies_listed = (
+            executor.submit(airtable.get_all_portfolio_companies)
+            if airtable.is_configured() else None
+        )
+
+        # Probe with a one-message page first so dormant channels skip the full
+        # history walk and don't use up the 20-company limit
+        active = executor.map(lambda ch: slack_utils.has_recent_activity(ch["id"], since), portfolio_channels)
+        active_channels = [ch for ch, is_active in zip(portfolio_channels, active) if is_active]
+        if companies_listed:
+            companies_listed.result()
+
+        results = executor.map(process_company, active_channels[:20])  # Limit to 20 companies
+        portfolio_updates = {
+            company_name: lp_section
+            for company_name, lp_section in results
+            if lp_section
+        }
 
     if not portfolio_updates:
         respond(**MessageFormatter.format_error("No portfolio activity found for this quarter."))
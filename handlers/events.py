@@ -1,35 +1,96 @@
+import atexit
+import logging
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict
+
 from slack_bolt import App
 
-from database import save_user_last_active
+from config import Config
+from database import save_users_last_active, add_agenda_item
+from utils import SlackUtils, MessageFormatter
+
+logger = logging.getLogger(__name__)
+
+# Message subtypes that don't count as user activity
+_IGNORED_SUBTYPES = frozenset({"bot_message", "message_changed", "message_deleted"})
+
+# Agenda prompt button action_id -> agenda category
+AGENDA_CATEGORIES = {
+    "agenda_investment": "Investment Decisions",
+    "agenda_pipeline": "Pipeline Review",
+    "agenda_portfolio": "Portfolio Company Updates",
+    "agenda_other": "Other Business",
+}
+_AGENDA_ACTION_RE = re.compile(r"^agenda_(investment|pipeline|portfolio|other)$")
+
+# Seconds between flushes of buffered user activity to the database
+ACTIVITY_FLUSH_SECONDS = 5
+
+# Latest activity per user since the last flush
+_pending_activity: Dict[str, datetime] = {}
+_activity_lock = threading.Lock()
+_flusher_started = False
+
+
+def _flush_activity():
+    """Write buffered last-active timestamps in a single batch."""
+    global _pending_activity
+    with _activity_lock:
+        batch, _pending_activity = _pending_activity, {}
+    if batch:
+        try:
+            save_users_last_active(batch)
+        except Exception as e:
+            logger.error(f"Error saving user activity: {e}")
+
+
+def _activity_flush_loop():
+    """Flush buffered activity every few seconds for the life of the process."""
+    while True:
+        time.sleep(ACTIVITY_FLUSH_SECONDS)
+        _flush_activity()
+
+
+def _start_activity_flusher():
+    """Start the background flusher once per process."""
+    global _flusher_started
+    with _activity_lock:
+        if _flusher_started:
+            return
+        _flusher_started = True
+    threading.Thread(target=_activity_flush_loop, daemon=True).start()
+    atexit.register(_flush_activity)
 
 
 def register_events(app: App):
     """Register Slack event handlers."""
+    _start_activity_flusher()
 
     @app.event("message")
     def handle_message(event, client):
         """Handle message events for tracking user activity."""
         # Skip bot messages and message changes
-        if event.get("subtype") in ["bot_message", "message_changed", "message_deleted"]:
+        if event.get("subtype") in _IGNORED_SUBTYPES:
             return
 
-        # Track user activity for catch-up feature
+        # Track user activity for catch-up feature; written in batches
         user_id = event.get("user")
         if user_id:
-            save_user_last_active(user_id)
+            with _activity_lock:
+                _pending_activity[user_id] = datetime.now()
 
     @app.event("member_joined_channel")
     def handle_member_joined(event, client, say):
         """Welcome new members to portfolio channels."""
-        from config import Config
-
         channel_id = event.get("channel")
         user_id = event.get("user")
 
-        # Get channel info
+        # Get channel info (cached, so repeat joins skip the API call)
         try:
-            result = client.conversations_info(channel=channel_id)
-            channel_name = result["channel"]["name"]
+            channel_name = SlackUtils(client).get_channel_name(channel_id)
 
             # Check if this is a portfolio channel
             if channel_name.startswith(Config.PORTFOLIO_CHANNEL_PREFIX):
@@ -44,29 +105,35 @@ def register_events(app: App):
         except Exception:
             pass  # Silently fail for non-accessible channels
 
-    @app.action("agenda_investment")
-    def handle_agenda_investment(ack, body, client):
-        """Handle investment agenda button click."""
-        ack()
-        _prompt_for_agenda_item(body, client, "Investment Decisions")
-
-    @app.action("agenda_pipeline")
-    def handle_agenda_pipeline(ack, body, client):
-        """Handle pipeline agenda button click."""
+    @app.event("channel_created")
+    def handle_channel_created(event):
+        """Cache the name of a newly created channel."""
+        channel = event["channel"]
+        SlackUtils.remember_channel(channel["id"], channel["name"])
+
+    @app.event("channel_rename")
+    def handle_channel_rename(event):
+        """Replace the cached name of a renamed channel."""
+        channel = event["channel"]
+        SlackUtils.forget_channel(channel["id"])
+        SlackUtils.remember_channel(channel["id"], channel["name"])
+
+    @app.event("channel_deleted")
+    def handle_channel_deleted(event):
+        """Invalidate the cached name of a deleted channel."""
+        SlackUtils.forget_channel(event["channel"])
+
+    @app.event("user_change")
+    def handle_user_change(event):
+        """Invalidate the cached display name of a user who edited their profile."""
+        SlackUtils.forget_user(event["user"]["id"])
+
+    @app.action(_AGENDA_ACTION_RE)
+    def handle_agenda_action(ack, body, client):
+        """Handle a category button click on the agenda prompt."""
         ack()
-        _prompt_for_agenda_item(body, client, "Pipeline Review")
-
-    @app.action("agenda_portfolio")
-    def handle_agenda_portfolio(ack, body, client):
-        """Handle portfolio agenda button click."""
-        ack()
-        _prompt_for_agenda_item(body, client, "Portfolio Company Updates")
-
-    @app.action("agenda_other")
-    def handle_agenda_other(ack, body, client):
-        """Handle other agenda button click."""
-        ack()
-        _prompt_for_agenda_item(body, client, "Other Business")
+        action_id = body["actions"][0]["action_id"]
+        _prompt_for_agenda_item(body, client, AGENDA_CATEGORIES[action_id])
 
     @app.action("google_auth")
     def handle_google_auth(ack, body):
@@ -129,9 +196,6 @@ def register_view_handlers(app: App):
     @app.view("agenda_item_modal")
     def handle_agenda_modal_submit(ack, body, client, view):
         """Handle agenda item modal submission."""
-        from database import add_agenda_item
-        from utils import MessageFormatter
-
         ack()
 
         user_id = body["user"]["id"]
@@ -156,4 +220,4 @@ def register_view_handlers(app: App):
                 **formatted
             )
         except Exception as e:
-            print(f"Error sending confirmation: {e}")
+            logger.error(f"Error sending confirmation: {e}")
@@ -2,17 +2,54 @@
 Mention handler using Claude's agentic tool use.
 Claude can call multiple tools in sequence for complex queries.
 """
+import logging
 from slack_bolt import App
+from slack_sdk.errors import SlackApiError
 import re
-from typing import Dict, Any
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Tuple, Callable
 
-from services import ClaudeService, FileService, WebService, ResearchService, AgentService
-from utils import SlackUtils, MessageFormatter, markdown_to_slack
+from utils import SlackUtils, HistoryMessage, MessageFormatter, markdown_to_slack
 from database import save_user_last_active, add_agenda_item, get_pending_agenda_items
 
+logger = logging.getLogger(__name__)
+
+# Compiled once; stripped from every app_mention event
+_MENTION_RE = re.compile(r"<@[A-Z0-9]+>")
+_FILENAME_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Chunking limits for long responses, just under Slack's block caps
+SECTION_CHARS = 2900
+BLOCKS_PER_MESSAGE = 45
+
+# Replies faster than this never show the "Thinking..." placeholder
+THINKING_DELAY_SECONDS = 0.5
+
+# How often a streamed answer is pushed to Slack with chat.update
+STREAM_UPDATE_SECONDS = 0.8
+
+# Most links from a message that are fetched ahead of the agent asking for them
+PREFETCH_URLS = 4
+
+# Runs blocking Slack/HTTP calls alongside the handler thread
+_io_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="mention-io")
+
+
+def _history_line(msg: HistoryMessage) -> str:
+    """One line of channel history for a tool result, listing any attached files."""
+    line = f"[{msg.timestamp}] {msg.user_name}: {msg.text}"
+    if msg.files:
+        line = f"{line} [Files: {', '.join([f.get('name', 'file') for f in msg.files])}]"
+    return line
+
 
 def register_mentions(app: App):
     """Register mention event handlers."""
+    # Imported here so loading this module doesn't pull in the service SDKs
+    from services import ClaudeService, FileService, WebService, ResearchService, AgentService
 
     claude = ClaudeService()
     file_service = FileService()
@@ -32,7 +69,7 @@ def register_mentions(app: App):
         slack_utils = SlackUtils(client)
 
         # Remove the bot mention from the text
-        clean_text = re.sub(r"<@[A-Z0-9]+>", "", text).strip()
+        clean_text = _MENTION_RE.sub("", text).strip()
 
         if not clean_text:
             say(
@@ -41,6 +78,29 @@ def register_mentions(app: App):
             )
             return
 
+        # Only post the placeholder if we haven't answered or reported
+        # progress by the time the delay runs out
+        thinking_lock = threading.Lock()
+        thinking_settled = False
+
+        def post_thinking():
+            nonlocal thinking_settled
+            with thinking_lock:
+                if not thinking_settled:
+                    thinking_settled = True
+                    say(text="_Thinking..._", thread_ts=thread_ts)
+
+        def settle_thinking():
+            nonlocal thinking_settled
+            thinking_timer.cancel()
+            # Waits out a placeholder that is mid-post so it can't land after us
+            with thinking_lock:
+                thinking_settled = True
+
+        thinking_timer = threading.Timer(THINKING_DELAY_SECONDS, post_thinking)
+        thinking_timer.daemon = True
+        thinking_timer.start()
+
         # Gather context
         context = {
             "channel_id": channel_id,
@@ -73,14 +133,23 @@ def register_mentions(app: App):
                 context["files"] = parent_files
                 context["file_names"] = [f.get("name", "file") for f in parent_files]
 
-            if parent_text:
+            # Both URL patterns need "http", so a substring probe skips the regexes
+            if parent_text and "http" in parent_text:
                 parent_urls = web_service.extract_urls_from_text(parent_text)
                 context["urls"].extend(parent_urls)
 
         # Check for URLs in current message
-        urls_in_message = web_service.extract_urls_from_text(text)
-        context["urls"].extend(urls_in_message)
-        context["urls"] = list(set(context["urls"]))
+        if "http" in text:
+            urls_in_message = web_service.extract_urls_from_text(text)
+            context["urls"].extend(urls_in_message)
+        if context["urls"]:
+            context["urls"] = list(dict.fromkeys(context["urls"]))
+            # Links in the message almost always get read, so fetch them while
+            # Claude plans its first step; fetch_url picks up the results
+            context["url_prefetch"] = {
+                url: _io_pool.submit(web_service.fetch_url, url)
+                for url in context["urls"][:PREFETCH_URLS]
+            }
 
         # Build tool executors
         tool_executors = build_tool_executors(
@@ -91,12 +160,18 @@ def register_mentions(app: App):
             slack_utils=slack_utils
         )
 
-        # Status callback to show progress
+        # Mirrors the answer into Slack while it is still being written
+        streamer = _ReplyStreamer(client, channel_id, thread_ts, before_first_post=settle_thinking)
+        streamer.start()
+
+        # Status callback to show progress. It fires once a step's tool calls
+        # are known, so the text streamed for that step ("let me check...") is
+        # not the answer: drop its draft before the status line goes out.
         def on_status(message: str):
+            streamer.discard()
+            settle_thinking()
             say(text=message, thread_ts=thread_ts)
 
-        say(text="_Thinking..._", thread_ts=thread_ts)
-
         try:
             # Run the agent loop
             result = agent.run(
@@ -104,23 +179,101 @@ def register_mentions(app: App):
                 tool_executors=tool_executors,
                 context=context,
                 max_steps=5,
-                on_status=on_status
+                on_status=on_status,
+                on_text=streamer.on_text
             )
+            settle_thinking()
 
             # Save user activity
             save_user_last_active(user_id)
 
-            # Send final response
+            # Send final response, replacing the streamed draft when it fits
             formatted = markdown_to_slack(result)
-            send_response(say, formatted, thread_ts)
+            if not streamer.finish(formatted):
+                send_response(say, formatted, thread_ts)
 
-        except Exception as e:
-            print(f"Agent error: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Agent error")
+            streamer.finish()
+            settle_thinking()
             say(text="Sorry, something went wrong. Try again?", thread_ts=thread_ts)
 
 
+class _ReplyStreamer:
+    """Posts the agent's in-progress answer and keeps it updated at a fixed interval."""
+
+    def __init__(self, client, channel_id: str, thread_ts: str, before_first_post: Callable[[], None]):
+        self.client = client
+        self.channel_id = channel_id
+        self.thread_ts = thread_ts
+        self.before_first_post = before_first_post
+        self.ts = None
+        self._text = ""
+        self._sent = ""
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def on_text(self, text: str):
+        """Record the latest snapshot of the answer; the next tick sends it."""
+        self._text = text
+
+    def _run(self):
+        while not self._stopped.wait(STREAM_UPDATE_SECONDS):
+            self._flush()
+
+    def _flush(self):
+        with self._lock:
+            text = self._text
+            if not text.strip() or text == self._sent:
+                return
+            preview = markdown_to_slack(text)[:3000]
+            try:
+                if self.ts is None:
+                    self.before_first_post()
+                    result = self.client.chat_postMessage(
+                        channel=self.channel_id, thread_ts=self.thread_ts, text=preview
+                    )
+                    self.ts = result["ts"]
+                else:
+                    self.client.chat_update(channel=self.channel_id, ts=self.ts, text=preview)
+                self._sent = text
+            except SlackApiError as e:
+                logger.error(f"Error streaming reply: {e}")
+
+    def discard(self):
+        """Delete the draft posted so far and start over with the next step's text."""
+        with self._lock:
+            self._text = self._sent = ""
+            if self.ts is None:
+                return
+            ts, self.ts = self.ts, None
+            try:
+                self.client.chat_delete(channel=self.channel_id, ts=ts)
+            except SlackApiError as e:
+                logger.error(f"Error discarding streamed draft: {e}")
+
+    def finish(self, final_text: str = None) -> bool:
+        """Stop streaming; return True if the final text replaced the draft in place."""
+        self._stopped.set()
+        self._thread.join()
+        if self.ts is None or final_text is None:
+            return False
+
+        try:
+            if len(final_text) <= 3000:
+                self.client.chat_update(channel=self.channel_id, ts=self.ts, text=final_text)
+                return True
+            # Too long for one message; the caller pages it out instead
+            self.client.chat_delete(channel=self.channel_id, ts=self.ts)
+        except SlackApiError as e:
+            logger.error(f"Error finalizing streamed reply: {e}")
+        return False
+
+
 def get_thread_parent_content(client, channel_id: str, thread_ts: str):
     """Get text and files from the parent message of a thread."""
     try:
@@ -134,7 +287,7 @@ def get_thread_parent_content(client, channel_id: str, thread_ts: str):
             parent_message = result["messages"][0]
             return parent_message.get("text", ""), parent_message.get("files", [])
     except Exception as e:
-        print(f"Error getting thread parent: {e}")
+        logger.error(f"Error getting thread parent: {e}")
     return "", []
 
 
@@ -143,6 +296,25 @@ def build_tool_executors(file_service, web_service, research_service, claude, sl
 
     # Store files found in channel history for later retrieval
     channel_files_cache = {}
+    # Filename word -> file info, so fuzzy lookups rarely need a full scan
+    channel_files_index = {}
+
+    # channel_id -> (hours fetched, messages), so one agent run walks each history once
+    channel_history_cache: Dict[str, Tuple[int, List[HistoryMessage]]] = {}
+
+    def get_history(channel_id: str, hours: int) -> List[HistoryMessage]:
+        """Fetch channel history, reusing a wider window fetched earlier in this run."""
+        cached = channel_history_cache.get(channel_id)
+        if cached and cached[0] >= hours:
+            cached_hours, messages = cached
+            if cached_hours == hours:
+                return messages
+            oldest = (datetime.now() - timedelta(hours=hours)).timestamp()
+            return [msg for msg in messages if float(msg.ts) >= oldest]
+
+        messages = slack_utils.get_channel_history(channel_id, hours=hours)
+        channel_history_cache[channel_id] = (hours, messages)
+        return messages
 
     def execute_add_to_agenda(tool_input: dict, context: dict) -> str:
         """Add an item to the Monday Investment Review agenda."""
@@ -172,12 +344,9 @@ def build_tool_executors(file_service, web_service, research_service, claude, sl
             return "The Monday agenda is empty. No items have been added yet."
 
         # Group by category
-        by_category = {}
+        by_category = defaultdict(list)
         for item in items:
-            cat = item["category"]
-            if cat not in by_category:
-                by_category[cat] = []
-            by_category[cat].append(item)
+            by_category[item["category"]].append(item)
 
         # Format output
         lines = ["Current Monday Investment Review Agenda:", ""]
@@ -198,27 +367,30 @@ def build_tool_executors(file_service, web_service, research_service, claude, sl
         if not files:
             return "No files are attached to this message. Use get_channel_history to find files shared earlier."
 
-        results = []
-        for file_info in files:
+        def read_one(file_info: dict) -> str:
             file_name = file_info.get("name", "file")
 
             if file_service.is_image(file_info):
                 # For images, describe them
                 image_data = file_service.get_image_for_vision(file_info)
                 if image_data:
-                    results.append(f"[Image: {file_name}] - Image file attached, use vision to analyze")
-                else:
-                    results.append(f"[Image: {file_name}] - Could not process image")
-            else:
-                # Extract text from documents
-                file_text = file_service.extract_text_from_file(file_info)
-                if file_text:
-                    # Truncate very long files
-                    if len(file_text) > 30000:
-                        file_text = file_text[:30000] + "\n[...truncated...]"
-                    results.append(f"=== {file_name} ===\n{file_text}")
-                else:
-                    results.append(f"[{file_name}] - Could not extract text")
+                    return f"[Image: {file_name}] - Image file attached, use vision to analyze"
+                return f"[Image: {file_name}] - Could not process image"
+
+            # Extract text from documents
+            file_text = file_service.extract_text_from_file(file_info, max_chars=30000)
+            if file_text:
+                # Truncate very long files
+                if len(file_text) > 30000:
+                    file_text = file_text[:30000] + "\n[...truncated...]"
+                return f"=== {file_name} ===\n{file_text}"
+            return f"[{file_name}] - Could not extract text"
+
+        # Download and extract every attachment concurrently, keeping message order
+        if len(files) == 1:
+            results = [read_one(files[0])]
+        else:
+            results = list(_io_pool.map(read_one, files))
 
         return "\n\n".join(results)
 
@@ -228,33 +400,25 @@ def build_tool_executors(file_service, web_service, research_service, claude, sl
         hours = tool_input.get("hours", 24)
         hours = min(hours, 168)  # Cap at 1 week
 
-        messages = slack_utils.get_channel_history(channel_id, hours=hours)
+        messages = get_history(channel_id, hours)
 
         if not messages:
             return "No messages found in the specified time period."
 
-        # Format messages and track files
-        formatted = []
+        # Track files for later retrieval
         for msg in messages:
-            line = f"[{msg['timestamp']}] {msg['user_name']}: {msg['text']}"
-
-            # Track files for later retrieval
-            if msg.get("files"):
-                file_names = []
-                for f in msg["files"]:
-                    fname = f.get("name", "file")
-                    file_names.append(fname)
-                    # Cache file info for read_file_by_name
-                    channel_files_cache[fname.lower()] = f
-                    # Also cache without extension for fuzzy matching
-                    base_name = fname.rsplit(".", 1)[0].lower()
-                    channel_files_cache[base_name] = f
-
-                line += f" [Files: {', '.join(file_names)}]"
-
-            formatted.append(line)
-
-        return "\n".join(formatted)
+            for f in msg.files:
+                fname = f.get("name", "file")
+                # Cache file info for read_file_by_name
+                channel_files_cache[fname.lower()] = f
+                # Also cache without extension for fuzzy matching
+                base_name = fname.rsplit(".", 1)[0].lower()
+                channel_files_cache[base_name] = f
+                for token in _FILENAME_TOKEN_RE.findall(base_name):
+                    if len(token) >= 3:
+                        channel_files_index.setdefault(token, f)
+
+        return "\n".join([_history_line(msg) for msg in messages])
 
     def execute_read_file_by_name(tool_input: dict, context: dict) -> str:
         """Read a specific file from channel history by name."""
@@ -272,7 +436,14 @@ def build_tool_executors(file_service, web_service, research_service, claude, sl
         if file_name_lower in channel_files_cache:
             file_info = channel_files_cache[file_name_lower]
         else:
-            # Try partial match
+            # Then any word of the requested name
+            for token in _FILENAME_TOKEN_RE.findall(file_name_lower.rsplit(".", 1)[0]):
+                if len(token) >= 3 and token in channel_files_index:
+                    file_info = channel_files_index[token]
+                    break
+
+        if not file_info:
+            # Fall back to a partial match
             for cached_name, cached_file in channel_files_cache.items():
                 if file_name_lower in cached_name or cached_name in file_name_lower:
                     file_info = cached_file
@@ -281,10 +452,10 @@ def build_tool_executors(file_service, web_service, research_service, claude, sl
         if not file_info:
             # File not in cache - need to search channel history
             channel_id = context.get("channel_id")
-            messages = slack_utils.get_channel_history(channel_id, hours=168)
+            messages = get_history(channel_id, 168)
 
             for msg in messages:
-                for f in msg.get("files", []):
+                for f in msg.files:
                     fname = f.get("name", "").lower()
                     if file_name_lower in fname or fname in file_name_lower:
                         file_info = f
@@ -302,7 +473,7 @@ def build_tool_executors(file_service, web_service, research_service, claude, sl
             # For images, we need to use vision - return a note
             return f"[{actual_name}] is an image. To analyze images, they need to be attached to the current message."
 
-        file_text = file_service.extract_text_from_file(file_info)
+        file_text = file_service.extract_text_from_file(file_info, max_chars=50000)
         if file_text:
             if len(file_text) > 50000:
                 file_text = file_text[:50000] + "\n[...truncated...]"
@@ -317,7 +488,8 @@ def build_tool_executors(file_service, web_service, research_service, claude, sl
         if not url:
             return "Please provide a URL."
 
-        content = web_service.fetch_url(url)
+        prefetched = context.get("url_prefetch", {}).get(url)
+        content = prefetched.result() if prefetched else web_service.fetch_url(url)
         if content:
             if len(content) > 50000:
                 content = content[:50000] + "\n[...truncated...]"
@@ -344,27 +516,18 @@ def build_tool_executors(file_service, web_service, research_service, claude, sl
         if not company_name:
             return "Please specify a company name."
 
-        channel_name = f"portfolio-{company_name.lower().replace(' ', '-')}"
+        channel_name = SlackUtils.portfolio_channel_name(company_name)
         channel_id = slack_utils.get_channel_id_by_name(channel_name)
 
         if not channel_id:
             return f"Could not find a channel for '{company_name}'. Expected channel: #{channel_name}"
 
-        messages = slack_utils.get_channel_history(channel_id, hours=168)
+        messages = get_history(channel_id, 168)
 
         if not messages:
             return f"No recent messages in #{channel_name}."
 
-        # Format messages
-        formatted = []
-        for msg in messages:
-            line = f"[{msg['timestamp']}] {msg['user_name']}: {msg['text']}"
-            if msg.get("files"):
-                file_names = [f.get("name", "file") for f in msg["files"]]
-                line += f" [Files: {', '.join(file_names)}]"
-            formatted.append(line)
-
-        return f"Recent messages from #{channel_name}:\n" + "\n".join(formatted)
+        return f"Recent messages from #{channel_name}:\n" + "\n".join([_history_line(msg) for msg in messages])
 
     return {
         "add_to_agenda": execute_add_to_agenda,
@@ -382,14 +545,49 @@ def send_response(say, content: str, thread_ts: str):
     """Send a response, handling long content with blocks."""
     if len(content) <= 3000:
         say(text=content, thread_ts=thread_ts)
-    else:
-        # Use blocks for longer content
-        blocks = [
-            {"type": "section", "text": {"type": "mrkdwn", "text": content[:3000]}}
-        ]
-        if len(content) > 3000:
-            blocks.append({"type": "section", "text": {"type": "mrkdwn", "text": content[3000:6000]}})
-        if len(content) > 6000:
-            blocks.append({"type": "section", "text": {"type": "mrkdwn", "text": content[6000:9000]}})
-
-        say(text=content[:200], blocks=blocks, thread_ts=thread_ts)
+        return
+
+    # Slack caps section text at 3000 chars and messages at 50 blocks
+    blocks = [
+        {"type": "section", "text": {"type": "mrkdwn", "text": chunk}}
+        for chunk in _chunk_mrkdwn(content)
+    ]
+    for i in range(0, len(blocks), BLOCKS_PER_MESSAGE):
+        say(text=content[:200], blocks=blocks[i:i + BLOCKS_PER_MESSAGE], thread_ts=thread_ts)
+
+
+def _chunk_mrkdwn(content: str, limit: int = SECTION_CHARS) -> List[str]:
+    """Split mrkdwn into sections on line breaks, keeping code fences balanced."""
+    fence = "```"
+    # Room to close a fence at the end of a chunk and reopen it in the next
+    budget = limit - 2 * (len(fence) + 1)
+
+    chunks = []
+    in_fence = False
+    pos = 0
+    while pos < len(content):
+        if len(content) - pos <= budget:
+            end = len(content)
+        else:
+            # Prefer a paragraph break, then a line break, then a hard split
+            end = content.rfind("\n\n", pos, pos + budget)
+            if end <= pos:
+                end = content.rfind("\n", pos, pos + budget)
+            if end <= pos:
+                end = pos + budget
+
+        chunk = content[pos:end]
+        opened_in_fence = in_fence
+        if chunk.count(fence) % 2:
+            in_fence = not in_fence
+        if opened_in_fence:
+            chunk = f"{fence}\n{chunk}"
+        if in_fence:
+            chunk = f"{chunk}\n{fence}"
+        chunks.append(chunk)
+
+        pos = end
+        while pos < len(content) and content[pos] == "\n":
+            pos += 1
+
+    return chunks
@@ -0,0 +1,124 @@
+"""
+Google OAuth callback server.
+
+Only started once a user is actually sent a Google auth link, so deployments
+that never connect Google don't hold an idle listener thread and port.
+"""
+import logging
+import threading
+from typing import Optional, TYPE_CHECKING
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from config import Config
+
+if TYPE_CHECKING:
+    from services import GoogleService
+
+logger = logging.getLogger(__name__)
+
+_oauth_lock = threading.Lock()
+_oauth_started = False
+
+# Shared by every OAuth callback instead of building a client per request
+_GOOGLE: Optional["GoogleService"] = None
+
+
+def _google() -> "GoogleService":
+    """Get the process-wide GoogleService, creating it on first use."""
+    global _GOOGLE
+    if _GOOGLE is None:
+        from services import GoogleService
+        _GOOGLE = GoogleService()
+    return _GOOGLE
+
+
+_OAUTH_OK_HTML = b"""<html>
+<head><title>Success</title></head>
+<body style="font-family: sans-serif; text-align: center; padding-top: 50px;">
+    <h1>Google Account Connected!</h1>
+    <p>You can close this window and return to Slack.</p>
+    <p>Try running <code>/pillar agenda finalize</code> again.</p>
+</body>
+</html>
+"""
+
+_OAUTH_ERR_HTML = b"""<html>
+<head><title>Error</title></head>
+<body style="font-family: sans-serif; text-align: center; padding-top: 50px;">
+    <h1>Connection Failed</h1>
+    <p>There was an error connecting your Google account.</p>
+    <p>Please try again from Slack.</p>
+</body>
+</html>
+"""
+
+
+class OAuthCallbackHandler(BaseHTTPRequestHandler):
+    """Handle Google OAuth callbacks."""
+
+    def do_GET(self):
+        """Handle GET requests for OAuth callback."""
+        parsed = urlparse(self.path)
+
+        if parsed.path == "/oauth/callback":
+            query_params = parse_qs(parsed.query)
+            code = query_params.get("code", [None])[0]
+            state = query_params.get("state", [None])[0]  # user_id
+
+            if code and state:
+                success = _google().handle_oauth_callback(
+                    user_id=state,
+                    code=code,
+                    redirect_uri=Config.OAUTH_REDIRECT_URI
+                )
+
+                if success:
+                    self._send(200, "text/html", _OAUTH_OK_HTML)
+                else:
+                    self._send(500, "text/html", _OAUTH_ERR_HTML)
+            else:
+                self._send(400, "text/plain", b"Missing code or state parameter")
+        else:
+            self._send(404, "text/plain", b"Not found")
+
+    def _send(self, status: int, content_type: str, body: bytes):
+        """Write a complete one-shot response and close the connection."""
+        self.send_response(status)
+        self.send_header("Content-type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Suppress default HTTP logging."""
+        logger.debug(f"OAuth server: {args[0]}")
+
+
+class OAuthServer(ThreadingHTTPServer):
+    """Threaded callback server; SO_REUSEPORT lets several workers share the port."""
+
+    allow_reuse_port = True
+
+
+def start_oauth_server():
+    """Start the OAuth callback HTTP server."""
+    server = OAuthServer(("localhost", 8080), OAuthCallbackHandler)
+    logger.info("OAuth callback server running on http://localhost:8080")
+    server.serve_forever()
+
+
+def ensure_oauth_server():
+    """Start the callback server in a background thread the first time it's needed."""
+    global _oauth_started
+    if not (Config.GOOGLE_CLIENT_ID and Config.GOOGLE_CLIENT_SECRET):
+        return
+
+    with _oauth_lock:
+        if _oauth_started:
+            return
+        _google()  # Warm up so the first callback doesn't pay for construction
+        oauth_thread = threading.Thread(target=start_oauth_server, daemon=True)
+        oauth_thread.start()
+        _oauth_started = True
@@ -1,9 +1,24 @@
-from .claude_service import ClaudeService
-from .google_service import GoogleService
-from .airtable_service import AirtableService
-from .file_service import FileService
-from .web_service import WebService
-from .research_service import ResearchService
-from .agent_service import AgentService
+import importlib
+
+# Service modules pull in heavy SDKs (anthropic, google-api-python-client,
+# pyairtable, tavily), so each one is imported on first attribute access
+_SERVICE_MODULES = {
+    "ClaudeService": ".claude_service",
+    "GoogleService": ".google_service",
+    "AirtableService": ".airtable_service",
+    "FileService": ".file_service",
+    "WebService": ".web_service",
+    "ResearchService": ".research_service",
+    "AgentService": ".agent_service",
+}
 
 __all__ = ["ClaudeService", "GoogleService", "AirtableService", "FileService", "WebService", "ResearchService", "AgentService"]
+
+
+def __getattr__(name):
+    module_name = _SERVICE_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
@@ -2,13 +2,18 @@
 Agentic service using Claude's tool use capability.
 Supports multi-step reasoning - Claude can call multiple tools in sequence.
 """
-from typing import List, Dict, Any, Optional, Callable
-from anthropic import Anthropic
-from config import Config
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Callable, Tuple, Final
+from services.anthropic_client import get_anthropic_client
 
+logger = logging.getLogger(__name__)
 
-# Tool definitions for Claude
-TOOLS = [
+
+# Tool definitions for Claude. Frozen: the same bytes must go out on every call
+# for the prompt-cache prefix to match
+TOOLS: Final = (
     {
         "name": "add_to_agenda",
         "description": "Add an item to the Monday Investment Review meeting agenda. Use this when someone asks to add something to the agenda, or says 'agenda this', 'add to monday meeting', etc. The item will be stored and included in the next agenda document.",
@@ -126,9 +131,47 @@ TOOLS = [
             "required": ["company_name"]
         }
     }
-]
+)
+
+# Read-only tools whose results can be reused when Claude repeats a call in one run
+CACHEABLE_TOOLS = frozenset({
+    "view_agenda",
+    "read_files",
+    "get_channel_history",
+    "read_file_by_name",
+    "fetch_url",
+    "search_web",
+    "get_portfolio_company_channel",
+})
+
+# Tools that share no state with the others (per-run file and history caches,
+# the agenda), so calls to them from one step can overlap. The rest run one at
+# a time, in the order Claude asked for them.
+CONCURRENT_TOOLS = frozenset({
+    "read_files",
+    "fetch_url",
+    "search_web",
+})
+
+# Tool name -> formatter for the status line shown while that tool runs
+_STATUS_MESSAGES: Final[Dict[str, Callable[[dict], str]]] = {
+    "add_to_agenda": lambda i: "Adding to Monday agenda...",
+    "view_agenda": lambda i: "Checking the agenda...",
+    "get_channel_history": lambda i: f"Scanning last {i.get('hours', 24)} hours of channel history...",
+    "read_files": lambda i: "Reading attached files...",
+    "read_file_by_name": lambda i: f"Reading {i.get('file_name', 'file')}...",
+    "fetch_url": lambda i: f"Fetching {i.get('url', '')[:50]}...",
+    "search_web": lambda i: f"Searching: {i.get('query', '')[:30]}...",
+    "get_portfolio_company_channel": lambda i: f"Getting updates on {i.get('company_name', 'company')}...",
+}
+
+
+def _default_status(tool_input: dict) -> str:
+    """Status line for tools without a specific message."""
+    return "Working..."
 
-SYSTEM_PROMPT = """You are the Pillar VC Slack bot - a helpful assistant for a venture capital firm.
+
+SYSTEM_PROMPT: Final = """You are the Pillar VC Slack bot - a helpful assistant for a venture capital firm.
 
 You have access to tools that let you:
 - Add items to the Monday Investment Review agenda
@@ -150,6 +193,59 @@ After gathering all the information you need, provide a final answer.
 TONE: Be concise and casual - this is Slack, not a memo. Use bullet points. Keep it tight. A little wit is ok but stay helpful."""
 
 
+# Prompt caching: the tools and system prompt are identical on every call, so a
+# breakpoint on the system block caches that whole prefix (tools come first)
+CACHED_SYSTEM: Final = [{"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}]
+
+
+def _move_cache_breakpoint(messages: List[Dict]):
+    """Put the conversation's cache breakpoint on the newest user block.
+
+    Each step re-sends everything before it, so caching up to the latest turn lets
+    the next step hit the cache. Older breakpoints are removed to stay under the
+    API's limit of four.
+    """
+    for message in messages:
+        if message["role"] == "user" and isinstance(message["content"], list):
+            for block in message["content"]:
+                block.pop("cache_control", None)
+
+    content = messages[-1]["content"]
+    if isinstance(content, list) and content:
+        content[-1]["cache_control"] = {"type": "ephemeral"}
+
+
+# Output budget per agent step, and the larger one used to retry a step
+# that was cut off mid tool call
+STEP_MAX_TOKENS = 4096
+EXTENDED_STEP_MAX_TOKENS = 8192
+
+# Longest tool result sent back to Claude
+MAX_TOOL_RESULT_CHARS = 50000
+
+
+def _truncate(text: str, limit: int) -> str:
+    """Cut text to limit chars, noting how much was dropped; short text is returned as-is."""
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}\n...[truncated {len(text) - limit} more chars]"
+
+
+# Tool results older than this many steps are replaced with a short stub
+TOOL_RESULT_KEEP_STEPS = 2
+_ELIDED_PREFIX = "<elided tool_result"
+
+
+def _elide_old_tool_results(tool_turns: List[Tuple[int, List[Dict]]], step: int):
+    """Shrink tool results Claude has already reasoned over, keeping context bounded."""
+    for result_step, tool_results in tool_turns:
+        if step - result_step <= TOOL_RESULT_KEEP_STEPS:
+            break
+        for block in tool_results:
+            if not block["content"].startswith(_ELIDED_PREFIX):
+                block["content"] = f"{_ELIDED_PREFIX} from step {result_step + 1}; {len(block['content'])} chars>"
+
+
 class AgentService:
     """
     Agentic service that runs a tool-use loop.
@@ -157,7 +253,7 @@ class AgentService:
     """
 
     def __init__(self):
-        self.client = Anthropic(api_key=Config.ANTHROPIC_API_KEY)
+        self.client = get_anthropic_client()
         self.model = "claude-sonnet-4-20250514"
 
     def run(
@@ -166,7 +262,8 @@ class AgentService:
         tool_executors: Dict[str, Callable],
         context: Dict[str, Any],
         max_steps: int = 5,
-        on_status: Callable[[str], None] = None
+        on_status: Callable[[str], None] = None,
+        on_text: Callable[[str], None] = None
     ) -> str:
         """
         Run the agent loop until Claude provides a final answer.
@@ -174,10 +271,16 @@ class AgentService:
         Args:
             user_message: The user's request
             tool_executors: Dict mapping tool names to executor functions
-                           Each executor takes (tool_input, context) and returns str
+                           Each executor takes (tool_input, context) and returns str.
+                           Calls to CONCURRENT_TOOLS may overlap the step's other
+                           calls, so those executors must keep no shared state
             context: Context dict with channel_id, files, urls, etc.
             max_steps: Maximum number of tool calls before forcing an answer
             on_status: Optional callback to report status updates
+            on_text: Optional callback receiving the current step's text so far,
+                     called as tokens stream in. A step that ends in tool calls
+                     then reports them through on_status, so its text is not
+                     the answer
 
         Returns:
             Final response text
@@ -197,73 +300,95 @@ class AgentService:
         messages = [
             {
                 "role": "user",
-                "content": f"""Current context:
+                "content": [{"type": "text", "text": f"""Current context:
 {context_str}
 
 User's request: {user_message}
 
-Use the available tools to gather information and answer the request. You can call multiple tools if needed."""
+Use the available tools to gather information and answer the request. You can call multiple tools if needed."""}]
             }
         ]
 
+        # (tool name, canonical input) -> result, for this run only
+        tool_cache: Dict[Tuple[str, str], str] = {}
+
+        # (step, tool_result blocks) for each tool turn, oldest first
+        tool_turns: List[Tuple[int, List[Dict]]] = []
+
         # Agent loop
+        max_tokens = STEP_MAX_TOKENS
         for step in range(max_steps):
-            response = self.client.messages.create(
+            _elide_old_tool_results(tool_turns, step)
+            _move_cache_breakpoint(messages)
+            response = self._create(
+                on_text,
                 model=self.model,
-                max_tokens=4096,
-                system=SYSTEM_PROMPT,
+                max_tokens=max_tokens,
+                system=CACHED_SYSTEM,
                 tools=TOOLS,
                 messages=messages
             )
 
-            # Check if Claude wants to use tools
-            tool_uses = [block for block in response.content if block.type == "tool_use"]
+            # Split the reply into tool calls and the first text block in one pass
+            tool_uses = []
+            text = None
+            for block in response.content:
+                if block.type == "tool_use":
+                    tool_uses.append(block)
+                elif text is None and block.type == "text":
+                    text = block.text
 
             if not tool_uses:
-                # No tool calls - Claude is done, extract final text
-                for block in response.content:
-                    if hasattr(block, "text"):
-                        return block.text
-                return "I couldn't find the information you need."
-
-            # Execute each tool call
-            tool_results = []
-            for tool_use in tool_uses:
-                tool_name = tool_use.name
-                tool_input = tool_use.input
-
-                if on_status:
-                    on_status(f"_{self._get_status_message(tool_name, tool_input)}_")
-
-                # Execute the tool
-                if tool_name in tool_executors:
-                    try:
-                        result = tool_executors[tool_name](tool_input, context)
-                    except Exception as e:
-                        result = f"Error: {str(e)}"
-                else:
-                    result = f"Tool '{tool_name}' is not available."
-
-                tool_results.append({
+                # No tool calls - Claude is done
+                return text if text is not None else "I couldn't find the information you need."
+
+            if response.stop_reason == "max_tokens":
+                # Cut off mid tool call, so the last call's input is incomplete.
+                # Retry once with more room; after that, stop and answer with
+                # what the earlier steps gathered.
+                if max_tokens < EXTENDED_STEP_MAX_TOKENS:
+                    logger.warning(f"Agent step {step + 1} hit max_tokens during a tool call; retrying with more room")
+                    max_tokens = EXTENDED_STEP_MAX_TOKENS
+                    continue
+                logger.warning(f"Agent step {step + 1} hit max_tokens again; asking for a final answer")
+                break
+
+            # Report every call up front so status order matches Claude's order
+            if on_status:
+                for tool_use in tool_uses:
+                    on_status(f"_{self._get_status_message(tool_use.name, tool_use.input)}_")
+
+            results = self._execute_step_tools(tool_uses, tool_executors, context, tool_cache)
+
+            tool_results = [
+                {
                     "type": "tool_result",
                     "tool_use_id": tool_use.id,
-                    "content": result[:50000]  # Truncate very long results
-                })
+                    "content": _truncate(result, MAX_TOOL_RESULT_CHARS)
+                }
+                for tool_use, result in zip(tool_uses, results)
+            ]
 
             # Add assistant's tool calls and results to conversation
             messages.append({"role": "assistant", "content": response.content})
             messages.append({"role": "user", "content": tool_results})
+            tool_turns.append((step, tool_results))
 
-        # Max steps reached - ask for final answer
-        messages.append({
-            "role": "user",
-            "content": "Please provide your final answer based on the information gathered so far."
+        # Max steps reached (or a step kept getting cut off) - ask for final answer.
+        # The last turn is always the user's (the request or tool results), so
+        # the prompt joins it rather than starting a second user turn.
+        messages[-1]["content"].append({
+            "type": "text",
+            "text": "Please provide your final answer based on the information gathered so far."
         })
 
-        response = self.client.messages.create(
+        _elide_old_tool_results(tool_turns, max_steps)
+        _move_cache_breakpoint(messages)
+        response = self._create(
+            on_text,
             model=self.model,
             max_tokens=2000,
-            system=SYSTEM_PROMPT,
+            system=CACHED_SYSTEM,
             messages=messages
         )
 
@@ -273,28 +398,76 @@ Use the available tools to gather information and answer the request. You can ca
 
         return "I gathered some information but couldn't formulate a complete answer."
 
+    def _execute_step_tools(
+        self,
+        tool_uses: List,
+        tool_executors: Dict[str, Callable],
+        context: Dict[str, Any],
+        tool_cache: Dict[Tuple[str, str], str]
+    ) -> List[str]:
+        """Run one step's tool calls, overlapping the I/O-bound ones that share no state."""
+        def execute(tool_use) -> str:
+            return self._execute_tool(tool_use, tool_executors, context, tool_cache)
+
+        concurrent = [i for i, tool_use in enumerate(tool_uses) if tool_use.name in CONCURRENT_TOOLS]
+        if len(tool_uses) == 1 or not concurrent:
+            return [execute(tool_use) for tool_use in tool_uses]
+
+        results: List[Optional[str]] = [None] * len(tool_uses)
+        with ThreadPoolExecutor(max_workers=len(concurrent)) as pool:
+            futures = {i: pool.submit(execute, tool_uses[i]) for i in concurrent}
+            # Stateful tools run here meanwhile, in Claude's order, so e.g. a
+            # history fetch fills the file cache before a read_file_by_name
+            for i, tool_use in enumerate(tool_uses):
+                if i not in futures:
+                    results[i] = execute(tool_use)
+            for i, future in futures.items():
+                results[i] = future.result()
+        return results
+
+    def _execute_tool(
+        self,
+        tool_use,
+        tool_executors: Dict[str, Callable],
+        context: Dict[str, Any],
+        tool_cache: Dict[Tuple[str, str], str]
+    ) -> str:
+        """Run one tool call, turning failures into a result Claude can read."""
+        tool_name = tool_use.name
+        if tool_name not in tool_executors:
+            return f"Tool '{tool_name}' is not available."
+
+        # Repeat read-only calls within a run reuse the first result
+        key = None
+        if tool_name in CACHEABLE_TOOLS:
+            key = (tool_name, json.dumps(tool_use.input, sort_keys=True))
+            if key in tool_cache:
+                return tool_cache[key]
+
+        try:
+            result = tool_executors[tool_name](tool_use.input, context)
+        except Exception as e:
+            return f"Error: {str(e)}"
+
+        if key is not None:
+            tool_cache[key] = result
+        elif tool_name == "add_to_agenda":
+            # The agenda changed, so earlier view_agenda results are stale
+            tool_cache.clear()
+        return result
+
+    def _create(self, on_text: Optional[Callable[[str], None]], **kwargs):
+        """Call the Messages API, streaming text to on_text when it is given."""
+        if on_text is None:
+            return self.client.messages.create(**kwargs)
+
+        text = ""
+        with self.client.messages.stream(**kwargs) as stream:
+            for delta in stream.text_stream:
+                text += delta
+                on_text(text)
+            return stream.get_final_message()
+
     def _get_status_message(self, tool_name: str, tool_input: dict) -> str:
         """Generate a user-friendly status message for a tool call."""
-        if tool_name == "add_to_agenda":
-            return "Adding to Monday agenda..."
-        elif tool_name == "view_agenda":
-            return "Checking the agenda..."
-        elif tool_name == "get_channel_history":
-            hours = tool_input.get("hours", 24)
-            return f"Scanning last {hours} hours of channel history..."
-        elif tool_name == "read_files":
-            return "Reading attached files..."
-        elif tool_name == "read_file_by_name":
-            file_name = tool_input.get("file_name", "file")
-            return f"Reading {file_name}..."
-        elif tool_name == "fetch_url":
-            url = tool_input.get("url", "")[:50]
-            return f"Fetching {url}..."
-        elif tool_name == "search_web":
-            query = tool_input.get("query", "")[:30]
-            return f"Searching: {query}..."
-        elif tool_name == "get_portfolio_company_channel":
-            company = tool_input.get("company_name", "company")
-            return f"Getting updates on {company}..."
-        else:
-            return f"Working..."
+        return _STATUS_MESSAGES.get(tool_name, _default_status)(tool_input)
@@ -1,13 +1,66 @@
+import functools
 from typing import Optional, List, Dict
 from pyairtable import Api, Table
+from pyairtable.formulas import EQUAL, FIELD, LOWER, STR_VALUE
 from config import Config
+from utils import TTLCache
+
+
+# Only request the columns we map, rather than every field of each record
+_COMPANY_FIELDS = [
+    "Name", "Stage", "Last Valuation", "Key Metrics", "Last Board Meeting",
+    "Sector", "Lead Partner", "Investment Date", "Notes",
+]
+_PIPELINE_FIELDS = [
+    "Company Name", "Status", "Sector", "Deal Owner", "Deal Stage", "Notes", "Next Steps",
+]
+
+
+def _name_formula(company_name: str) -> str:
+    """Case-insensitive match on the Name field, with the value safely quoted."""
+    return EQUAL(LOWER(FIELD("Name")), LOWER(STR_VALUE(company_name)))
+
+
+@functools.cache
+def _shared_api(api_key: str) -> Api:
+    """One Api per key, so every service instance reuses the same pooled session."""
+    # (connect, read) timeouts; the default is to wait forever on a stuck socket
+    return Api(api_key, timeout=(5, 30))
+
+
+def _company_from_record(record: Dict) -> Dict:
+    """Map a Portfolio Companies record to the dict the handlers use."""
+    fields = record["fields"]
+    return {
+        "id": record["id"],
+        "name": fields.get("Name"),
+        "stage": fields.get("Stage"),
+        "valuation": fields.get("Last Valuation"),
+        "metrics": fields.get("Key Metrics"),
+        "last_board": fields.get("Last Board Meeting"),
+        "sector": fields.get("Sector"),
+        "lead_partner": fields.get("Lead Partner"),
+        "investment_date": fields.get("Investment Date"),
+        "notes": fields.get("Notes"),
+    }
 
 
 class AirtableService:
     """Service for interacting with Airtable for portfolio and pipeline data."""
 
+    # Decoded records, shared across instances; portfolio and pipeline data
+    # change rarely compared to how often an agent run or LP letter reads them.
+    # Callers get copies, so nothing they do to a result leaks into the cache.
+    _company_cache = TTLCache(ttl=300, maxsize=512)
+    _company_list_cache = TTLCache(ttl=300, maxsize=1)
+    _pipeline_cache = TTLCache(ttl=300, maxsize=32)
+    # Lower-cased name -> Slack channel from Airtable, "" when none is set
+    _slack_channel_cache = TTLCache(ttl=300, maxsize=256)
+    # (table, lower-cased name) -> record id; ids are stable, so this lives longer
+    _record_id_cache = TTLCache(ttl=24 * 60 * 60, maxsize=1024)
+
     def __init__(self):
-        self.api = Api(Config.AIRTABLE_API_KEY) if Config.AIRTABLE_API_KEY else None
+        self.api = _shared_api(Config.AIRTABLE_API_KEY) if Config.AIRTABLE_API_KEY else None
         self.base_id = Config.AIRTABLE_BASE_ID
 
     def _get_table(self, table_name: str) -> Optional[Table]:
@@ -22,23 +75,18 @@ class AirtableService:
         if not table:
             return None
 
+        cache_key = company_name.lower()
+        company = self._company_cache.get(cache_key)
+        if company is not None:
+            return dict(company)
+
         try:
             # Search for company by name (case-insensitive)
-            records = table.all(formula=f"LOWER({{Name}}) = LOWER('{company_name}')")
-            if records:
-                record = records[0]
-                return {
-                    "id": record["id"],
-                    "name": record["fields"].get("Name"),
-                    "stage": record["fields"].get("Stage"),
-                    "valuation": record["fields"].get("Last Valuation"),
-                    "metrics": record["fields"].get("Key Metrics"),
-                    "last_board": record["fields"].get("Last Board Meeting"),
-                    "sector": record["fields"].get("Sector"),
-                    "lead_partner": record["fields"].get("Lead Partner"),
-                    "investment_date": record["fields"].get("Investment Date"),
-                    "notes": record["fields"].get("Notes"),
-                }
+            record = self._find_company_record(table, company_name, _COMPANY_FIELDS)
+            if record:
+                company = _company_from_record(record)
+                self._company_cache.set(cache_key, company)
+                return dict(company)
             return None
         except Exception as e:
             print(f"Error fetching company from Airtable: {e}")
@@ -50,18 +98,23 @@ class AirtableService:
         if not table:
             return []
 
+        companies = self._company_list_cache.get("all")
+        if companies is not None:
+            return [dict(company) for company in companies]
+
         try:
-            records = table.all()
-            return [
-                {
-                    "id": record["id"],
-                    "name": record["fields"].get("Name"),
-                    "stage": record["fields"].get("Stage"),
-                    "sector": record["fields"].get("Sector"),
-                    "lead_partner": record["fields"].get("Lead Partner"),
-                }
-                for record in records
-            ]
+            # Fetch the full company fields so the listing also warms the
+            # per-company caches; the LP letter otherwise does a formula lookup
+            # per company right after listing them
+            records = table.all(fields=_COMPANY_FIELDS)
+            companies = [_company_from_record(record) for record in records]
+            for company in companies:
+                if company["name"]:
+                    name = company["name"].lower()
+                    self._company_cache.set(name, company)
+                    self._record_id_cache.set(("Portfolio Companies", name), company["id"])
+            self._company_list_cache.set("all", companies)
+            return [dict(company) for company in companies]
         except Exception as e:
             print(f"Error fetching companies from Airtable: {e}")
             return []
@@ -72,13 +125,19 @@ class AirtableService:
         if not table:
             return []
 
+        deals = self._pipeline_cache.get(status)
+        if deals is not None:
+            return [dict(deal) for deal in deals]
+
         try:
             if status:
-                records = table.all(formula=f"{{Status}} = '{status}'")
+                records = table.all(
+                    formula=EQUAL(FIELD("Status"), STR_VALUE(status)), fields=_PIPELINE_FIELDS
+                )
             else:
-                records = table.all()
+                records = table.all(fields=_PIPELINE_FIELDS)
 
-            return [
+            deals = [
                 {
                     "id": record["id"],
                     "company": record["fields"].get("Company Name"),
@@ -91,6 +150,8 @@ class AirtableService:
                 }
                 for record in records
             ]
+            self._pipeline_cache.set(status, deals)
+            return [dict(deal) for deal in deals]
         except Exception as e:
             print(f"Error fetching pipeline from Airtable: {e}")
             return []
@@ -102,18 +163,37 @@ class AirtableService:
             return False
 
         try:
-            records = table.all(formula=f"LOWER({{Name}}) = LOWER('{company_name}')")
-            if records:
-                record_id = records[0]["id"]
-                existing_notes = records[0]["fields"].get("Notes", "")
+            record = self._find_company_record(table, company_name, ["Notes"])
+            if record:
+                record_id = record["id"]
+                existing_notes = record["fields"].get("Notes", "")
                 updated_notes = f"{existing_notes}\n\n---\n{notes}" if existing_notes else notes
                 table.update(record_id, {"Notes": updated_notes})
+                # Both the per-company entry and the full listing carry the old notes
+                self._company_cache.pop(company_name.lower())
+                self._company_list_cache.clear()
                 return True
             return False
         except Exception as e:
             print(f"Error updating company notes: {e}")
             return False
 
+    def _find_company_record(self, table: Table, company_name: str, fields: List[str]) -> Optional[Dict]:
+        """Find a company's record, by remembered id when possible instead of a formula scan."""
+        cache_key = ("Portfolio Companies", company_name.lower())
+        record_id = self._record_id_cache.get(cache_key)
+        if record_id is not None:
+            try:
+                return table.get(record_id)
+            except Exception:
+                # Deleted or moved; forget it and search by name
+                self._record_id_cache.pop(cache_key)
+
+        record = table.first(formula=_name_formula(company_name), fields=fields)
+        if record:
+            self._record_id_cache.set(cache_key, record["id"])
+        return record
+
     def add_agenda_item_to_airtable(self, category: str, item: str, submitted_by: str) -> bool:
         """Add an agenda item to an Airtable tracking table."""
         table = self._get_table("Meeting Agenda Items")
@@ -133,16 +213,24 @@ class AirtableService:
             return False
 
     def get_company_slack_channel(self, company_name: str) -> Optional[str]:
-        """Get the Slack channel name for a portfolio company."""
-        company = self.get_portfolio_company(company_name)
-        if company:
-            # Try to get from Airtable, or construct from naming convention
-            channel = company.get("slack_channel")
-            if channel:
-                return channel
-            # Fall back to convention: portfolio-companyname
-            return f"{Config.PORTFOLIO_CHANNEL_PREFIX}{company_name.lower().replace(' ', '-')}"
-        return None
+        """Get the Slack channel Airtable lists for a company, if one is set."""
+        table = self._get_table("Portfolio Companies")
+        if not table:
+            return None
+
+        # Only consulted when the naming-convention channel doesn't exist, so
+        # this fetches the one field rather than the whole company record
+        cache_key = company_name.lower()
+        channel = self._slack_channel_cache.get(cache_key)
+        if channel is None:
+            try:
+                record = self._find_company_record(table, company_name, ["Slack Channel"])
+            except Exception as e:
+                print(f"Error fetching company channel from Airtable: {e}")
+                return None
+            channel = (record["fields"].get("Slack Channel") or "").lstrip("#") if record else ""
+            self._slack_channel_cache.set(cache_key, channel)
+        return channel or None
 
     def is_configured(self) -> bool:
         """Check if Airtable is properly configured."""
@@ -0,0 +1,10 @@
+import functools
+from anthropic import Anthropic
+from config import Config
+
+
+@functools.cache
+def get_anthropic_client() -> Anthropic:
+    """The process-wide Anthropic client, shared so every service reuses one connection pool."""
+    # The SDK retries 429/529/5xx with exponential backoff and jitter
+    return Anthropic(api_key=Config.ANTHROPIC_API_KEY, max_retries=4)
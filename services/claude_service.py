@@ -1,6 +1,8 @@
-from typing import List, Dict
-from anthropic import Anthropic
-from config import Config
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
+from services.anthropic_client import get_anthropic_client
+from utils import HistoryMessage
 
 # Personality for Slack responses - casual, concise, fun
 SLACK_TONE = """IMPORTANT TONE GUIDELINES:
@@ -13,14 +15,91 @@ SLACK_TONE = """IMPORTANT TONE GUIDELINES:
 - Get to the point fast"""
 
 
+# Keyword patterns for parse_command's local fast path, one intent each
+_INTENT_PATTERNS = [
+    (re.compile(r"\b(summar\w*|tl;?dr|recap)\b", re.I), "summarize"),
+    (re.compile(r"\b(action items?|to-?dos?|follow[- ]?ups?)\b", re.I), "actions"),
+    (re.compile(r"\bagenda\b", re.I), "agenda"),
+    (re.compile(r"\b(lp[- ]?letter|limited partners?)\b", re.I), "lp_letter"),
+    (re.compile(r"\bportfolio\b", re.I), "portfolio"),
+    (re.compile(r"\b(research|look up|search|stock price|latest news)\b", re.I), "research"),
+    (re.compile(r"^\s*help\b|\bwhat can you do\b", re.I), "help"),
+]
+_TIME_PAT = re.compile(r"\b\d+\s*(?:day|hour|week)s?\b|\bsince\s+\w+|\bthis\s+week\b|\btoday\b|\byesterday\b", re.I)
+_CHANNEL_MENTION_PAT = re.compile(r"<#C[A-Z0-9]+\|([^>]+)>")
+_USER_MENTION_PAT = re.compile(r"<@(U[A-Z0-9]+)>")
+_NAMED_TARGET_PAT = re.compile(r"\b(?:on|for|about)\s+([A-Z][\w&.-]*(?:\s+[A-Z][\w&.-]*)*)")
+
+
+def _parse_command_locally(text: str) -> Optional[dict]:
+    """Classify a command by keyword; None if no intent or several conflicting ones match."""
+    intents = {intent for pattern, intent in _INTENT_PATTERNS if pattern.search(text)}
+    if len(intents) != 1:
+        return None
+
+    target = None
+    for pattern in (_CHANNEL_MENTION_PAT, _USER_MENTION_PAT, _NAMED_TARGET_PAT):
+        match = pattern.search(text)
+        if match:
+            target = match.group(1)
+            break
+
+    time_match = _TIME_PAT.search(text)
+    return {
+        "intent": intents.pop(),
+        "target": target,
+        "time_period": time_match.group(0) if time_match else None,
+        "additional_context": None,
+    }
+
+
+# Agenda sections in meeting order, keyed by every category name the bot stores
+# (slash command / modal names and the agent's add_to_agenda names)
+_AGENDA_SECTIONS = {
+    "Investment Decisions": "Investment Decisions",
+    "Pipeline": "Pipeline",
+    "Pipeline Review": "Pipeline",
+    "Portfolio Updates": "Portfolio Updates",
+    "Portfolio Company Updates": "Portfolio Updates",
+    "Other": "Other",
+    "Other Business": "Other",
+}
+
+
+def _render_agenda_deterministic(items: List[Dict], meeting_type: str) -> Optional[str]:
+    """Render the plain-text agenda directly; None if an item has an unknown category."""
+    sections = {section: [] for section in dict.fromkeys(_AGENDA_SECTIONS.values())}
+    for item in items:
+        section = _AGENDA_SECTIONS.get(item["category"])
+        if section is None:
+            return None
+        sections[section].append(item["content"])
+
+    lines = [meeting_type]
+    for section, contents in sections.items():
+        if contents:
+            lines.append("")
+            lines.append(section)
+            lines.extend(f"  • {content}" for content in contents)
+    return "\n".join(lines)
+
+
+def _format_message_line(msg: HistoryMessage) -> str:
+    """One prompt line for a Slack message, noting any attached files."""
+    line = f"[{msg.timestamp}] {msg.user_name}: {msg.text}"
+    if msg.files:
+        line = f"{line} [Attached: {', '.join([f.get('name', 'file') for f in msg.files])}]"
+    return line
+
+
 class ClaudeService:
     """Service for interacting with Claude API for summarization and content generation."""
 
     def __init__(self):
-        self.client = Anthropic(api_key=Config.ANTHROPIC_API_KEY)
+        self.client = get_anthropic_client()
         self.model = "claude-sonnet-4-20250514"
 
-    def summarize_messages(self, messages: List[Dict], context: str = "") -> str:
+    def summarize_messages(self, messages: List[HistoryMessage], context: str = "") -> str:
         """Summarize a list of Slack messages."""
         formatted_messages = self._format_messages_for_prompt(messages)
 
@@ -41,14 +120,9 @@ Give a quick, scannable summary:
 
 Keep it tight - nobody wants to read a wall of text."""
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=1000,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.content[0].text
+        return self._complete(prompt, max_tokens=1000)
 
-    def extract_action_items(self, messages: List[Dict], user_filter: str = None) -> str:
+    def extract_action_items(self, messages: List[HistoryMessage], user_filter: str = None) -> str:
         """Extract action items from messages."""
         formatted_messages = self._format_messages_for_prompt(messages)
 
@@ -68,15 +142,15 @@ List action items as:
 
 Keep it short. If nothing actionable, just say "No action items - you're all clear!" """
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=800,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.content[0].text
+        return self._complete(prompt, max_tokens=800)
 
     def generate_meeting_agenda(self, items: List[Dict], meeting_type: str = "Monday Investment Review") -> str:
         """Generate a formatted meeting agenda from collected items."""
+        # Items in known categories just need sorting into sections; no model needed
+        agenda = _render_agenda_deterministic(items, meeting_type)
+        if agenda is not None:
+            return agenda
+
         items_text = "\n".join([
             f"- [{item['category']}] {item['content']}"
             for item in items
@@ -115,14 +189,11 @@ Other
 
 Just organize the submitted items into the right sections. If a section has no items, omit it entirely. Keep it brief."""
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=1000,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.content[0].text
+        return self._complete(prompt, max_tokens=1000)
 
-    def generate_portfolio_update(self, company_name: str, messages: List[Dict], airtable_data: dict = None) -> str:
+    def generate_portfolio_update(
+        self, company_name: str, messages: List[HistoryMessage], airtable_data: dict = None
+    ) -> str:
         """Generate a portfolio company update summary."""
         formatted_messages = self._format_messages_for_prompt(messages)
 
@@ -146,12 +217,7 @@ Hit the highlights:
 
 Keep it snappy - just the stuff that matters."""
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=800,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.content[0].text
+        return self._complete(prompt, max_tokens=800)
 
     def generate_lp_letter_section(self, company_name: str, updates: str) -> str:
         """Generate an LP letter section for a portfolio company."""
@@ -166,24 +232,22 @@ Write in a professional but engaging tone suitable for Limited Partners.
 Focus on key achievements, growth metrics, and outlook.
 Keep it to 2-3 paragraphs. Be optimistic but honest."""
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=800,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.content[0].text
+        return self._complete(prompt, max_tokens=800)
 
     def generate_full_lp_letter(self, portfolio_updates: Dict[str, str], quarter: str) -> str:
-        """Generate a full LP letter from portfolio updates."""
+        """Generate a full LP letter around already-drafted company sections."""
         updates_text = "\n\n".join([
             f"{company}:\n{update}"
             for company, update in portfolio_updates.items()
         ])
 
-        prompt = f"""You are a helpful assistant for Pillar VC, a venture capital firm.
-Create a quarterly LP letter for {quarter}.
+        # The company sections are used verbatim, so Claude only writes the
+        # framing. Opening and closing are independent and run concurrently.
+        preamble = f"""You are a helpful assistant for Pillar VC, a venture capital firm.
+You are writing parts of the quarterly LP letter for {quarter}.
 
-Portfolio company updates:
+These portfolio company sections are already written and will appear verbatim
+under a "Portfolio Updates" header:
 {updates_text}
 
 IMPORTANT FORMATTING RULES:
@@ -191,25 +255,44 @@ IMPORTANT FORMATTING RULES:
 - Use blank lines to separate sections
 - Use simple section headers like "Executive Summary" on their own line
 - Write in flowing paragraphs, not bullet points
+- Do NOT repeat the company sections themselves
 
-Structure:
+Write in a professional, confident tone suitable for Limited Partners."""
+
+        opening_prompt = f"""{preamble}
+
+Write only the opening of the letter, with these sections in order:
 1. Executive Summary - overall fund performance and highlights
 2. Market Commentary - brief observations
-3. Portfolio Highlights - top performing companies
-4. Portfolio Updates - section for each company
-5. Looking Ahead - outlook
+3. Portfolio Highlights - top performing companies"""
 
-Write in a professional, confident tone suitable for Limited Partners."""
+        closing_prompt = f"""{preamble}
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=4000,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response.content[0].text
+Write only the closing "Looking Ahead" section - outlook for the coming quarter.
+Start with the header "Looking Ahead" on its own line and keep it to 1-2 paragraphs."""
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            opening = executor.submit(self._complete, opening_prompt, 1200)
+            closing = executor.submit(self._complete, closing_prompt, 400)
+
+            company_sections = "\n\n".join(
+                f"{company}\n{section.strip()}"
+                for company, section in portfolio_updates.items()
+            )
+            return "\n\n".join([
+                opening.result().strip(),
+                "Portfolio Updates",
+                company_sections,
+                closing.result().strip(),
+            ])
 
     def parse_command(self, text: str) -> dict:
         """Parse natural language commands from mentions."""
+        # Most messages name their intent outright; only ask Claude when they don't
+        parsed = _parse_command_locally(text)
+        if parsed:
+            return parsed
+
         prompt = f"""Parse this Slack message into a command for the Pillar VC bot.
 
 Message: {text}
@@ -227,15 +310,11 @@ target: <target or "none">
 time_period: <period or "none">
 additional_context: <context or "none">"""
 
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=200,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        text = self._complete(prompt, max_tokens=200)
 
         # Parse the response
         result = {"intent": "unknown", "target": None, "time_period": None, "additional_context": None}
-        for line in response.content[0].text.strip().split("\n"):
+        for line in text.strip().split("\n"):
             if ": " in line:
                 key, value = line.split(": ", 1)
                 key = key.strip().lower().replace(" ", "_")
@@ -246,19 +325,15 @@ additional_context: <context or "none">"""
                     result[key] = value
         return result
 
-    def _format_messages_for_prompt(self, messages: List[Dict]) -> str:
+    def _complete(self, prompt: str, max_tokens: int) -> str:
+        """Run a single-prompt completion and return its text."""
+        response = self.client.messages.create(
+            model=self.model,
+            max_tokens=max_tokens,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        return response.content[0].text
+
+    def _format_messages_for_prompt(self, messages: List[HistoryMessage]) -> str:
         """Format Slack messages for inclusion in a prompt."""
-        formatted = []
-        for msg in messages:
-            user = msg.get("user_name", msg.get("user", "Unknown"))
-            text = msg.get("text", "")
-            timestamp = msg.get("timestamp", "")
-            files = msg.get("files", [])
-
-            line = f"[{timestamp}] {user}: {text}"
-            if files:
-                file_names = [f.get("name", "file") for f in files]
-                line += f" [Attached: {', '.join(file_names)}]"
-            formatted.append(line)
-
-        return "\n".join(formatted)
+        return "\n".join([_format_message_line(msg) for msg in messages])
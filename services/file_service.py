@@ -1,10 +1,54 @@
 import io
-import base64
-import requests
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, Tuple, Iterator
 from pypdf import PdfReader
 
 from config import Config
+from utils import create_http_session, TTLCache
+
+try:
+    # SIMD encoder with the stdlib's API; images can be several MB
+    import pybase64 as _b64
+except ImportError:
+    import base64 as _b64
+
+try:
+    # MuPDF's compiled text extractor is roughly 10x faster than pypdf
+    import fitz
+except ImportError:
+    fitz = None
+
+
+IMAGE_FILETYPE_TO_MIME = {
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "gif": "image/gif",
+    "webp": "image/webp",
+    "bmp": "image/bmp",
+}
+
+# Slack filetypes extract_text_from_file can't turn into text
+UNREADABLE_FILETYPES = frozenset({
+    "doc", "docx", "xls", "xlsx", "ppt", "pptx", "zip", "gzip", "tar",
+    "mp3", "m4a", "wav", "mp4", "mov", *IMAGE_FILETYPE_TO_MIME,
+})
+
+
+# Far more text than fits in Claude's context; extraction stops past this
+MAX_PDF_CHARS = 500_000
+
+
+def _iter_pdf_page_text(file_content: bytes, max_pages: Optional[int] = None) -> Iterator[str]:
+    """Yield each page's text, using PyMuPDF when installed and pypdf otherwise."""
+    if fitz is not None:
+        with fitz.open(stream=file_content, filetype="pdf") as doc:
+            # Pages are loaded by index, so ones past a limit are never parsed
+            for index in range(min(doc.page_count, max_pages or doc.page_count)):
+                yield doc.load_page(index).get_text("text")
+    else:
+        pages = PdfReader(io.BytesIO(file_content)).pages
+        for index in range(min(len(pages), max_pages or len(pages))):
+            yield pages[index].extract_text()
 
 
 class FileService:
@@ -13,16 +57,42 @@ class FileService:
     IMAGE_TYPES = ["jpg", "jpeg", "png", "gif", "webp", "bmp"]
     IMAGE_MIMETYPES = ["image/jpeg", "image/png", "image/gif", "image/webp", "image/bmp"]
 
+    # Slack file id -> (base64_data, media_type), so an image referenced again
+    # in a thread skips both the download and the encode
+    _image_cache = TTLCache(ttl=60 * 60, maxsize=16)
+    # Larger images aren't cached, bounding the cache to well under 200 MB
+    MAX_CACHED_IMAGE_BYTES = 8 * 1024 * 1024
+
     def __init__(self):
         self.bot_token = Config.SLACK_BOT_TOKEN
+        # Every download goes to files.slack.com, so keep the connection alive
+        self.session = create_http_session()
 
     def download_file(self, file_url: str) -> Optional[bytes]:
-        """Download a file from Slack using bot token authentication."""
+        """Download a file from Slack using bot token authentication.
+
+        When Slack sends a Content-Length, the body is read straight into a
+        buffer of that size and returned as a bytearray, avoiding the chunk
+        list and final copy that response.content makes.
+        """
         try:
             headers = {"Authorization": f"Bearer {self.bot_token}"}
-            response = requests.get(file_url, headers=headers)
-            response.raise_for_status()
-            return response.content
+            with self.session.get(file_url, headers=headers, stream=True, timeout=15) as response:
+                response.raise_for_status()
+                length = int(response.headers.get("content-length") or 0)
+                # A compressed body's decoded size isn't known up front
+                if not length or response.headers.get("content-encoding"):
+                    return response.content
+
+                # urllib3 enforces Content-Length, so the body fits exactly
+                buf = bytearray(length)
+                offset = 0
+                with memoryview(buf) as view:
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        view[offset:offset + len(chunk)] = chunk
+                        offset += len(chunk)
+                del buf[offset:]
+                return buf
         except Exception as e:
             print(f"Error downloading file: {e}")
             return None
@@ -42,6 +112,11 @@ class FileService:
         if not url:
             return None
 
+        file_id = file_info.get("id")
+        cached = self._image_cache.get(file_id) if file_id else None
+        if cached is not None:
+            return cached
+
         content = self.download_file(url)
         if not content:
             return None
@@ -50,42 +125,50 @@ class FileService:
         mimetype = file_info.get("mimetype", "").lower()
         if not mimetype or mimetype not in self.IMAGE_MIMETYPES:
             file_type = file_info.get("filetype", "").lower()
-            mimetype_map = {
-                "jpg": "image/jpeg",
-                "jpeg": "image/jpeg",
-                "png": "image/png",
-                "gif": "image/gif",
-                "webp": "image/webp",
-                "bmp": "image/bmp",
-            }
-            mimetype = mimetype_map.get(file_type, "image/jpeg")
+            mimetype = IMAGE_FILETYPE_TO_MIME.get(file_type, "image/jpeg")
 
         # Encode as base64
-        base64_data = base64.standard_b64encode(content).decode("utf-8")
+        base64_data = _b64.b64encode(content).decode("ascii")
+        if file_id and len(content) <= self.MAX_CACHED_IMAGE_BYTES:
+            self._image_cache.set(file_id, (base64_data, mimetype))
         return base64_data, mimetype
 
-    def extract_text_from_pdf(self, file_content: bytes) -> Optional[str]:
-        """Extract text content from a PDF file."""
+    def extract_text_from_pdf(
+        self, file_content: bytes, max_chars: Optional[int] = MAX_PDF_CHARS,
+        max_pages: Optional[int] = None
+    ) -> Optional[str]:
+        """Extract text content from a PDF file, stopping once past max_chars or max_pages."""
         try:
-            pdf_file = io.BytesIO(file_content)
-            reader = PdfReader(pdf_file)
-
-            text_parts = []
-            for page in reader.pages:
-                text = page.extract_text()
+            # Pages are written straight into one buffer rather than kept as a
+            # list of strings and joined at the end
+            buf = io.StringIO()
+            for text in _iter_pdf_page_text(file_content, max_pages):
                 if text:
-                    text_parts.append(text)
-
-            return "\n\n".join(text_parts) if text_parts else None
+                    if buf.tell():
+                        buf.write("\n\n")
+                    buf.write(text)
+                    # Callers truncate anyway, so skip parsing the remaining pages
+                    if max_chars is not None and buf.tell() > max_chars:
+                        break
+
+            return buf.getvalue() or None
         except Exception as e:
             print(f"Error extracting PDF text: {e}")
             return None
 
-    def extract_text_from_file(self, file_info: Dict) -> Optional[str]:
-        """Extract text from a file based on its type."""
+    def extract_text_from_file(self, file_info: Dict, max_chars: Optional[int] = MAX_PDF_CHARS) -> Optional[str]:
+        """Extract text from a file based on its type.
+
+        With max_chars, extraction may stop early once the text exceeds it.
+        """
         file_type = file_info.get("filetype", "").lower()
         mimetype = file_info.get("mimetype", "").lower()
 
+        # Types we can't read are rejected before anything is downloaded.
+        # Word docs would need python-docx, so they're skipped for now.
+        if file_type in UNREADABLE_FILETYPES or mimetype.startswith(("image/", "audio/", "video/")):
+            return None
+
         # Get the private download URL
         url = file_info.get("url_private_download") or file_info.get("url_private")
         if not url:
@@ -98,18 +181,13 @@ class FileService:
 
         # Handle different file types
         if file_type == "pdf" or "pdf" in mimetype:
-            return self.extract_text_from_pdf(content)
-        elif file_type in ["txt", "text", "md", "markdown"]:
-            return content.decode("utf-8", errors="ignore")
-        elif file_type in ["doc", "docx"]:
-            # For Word docs, we'd need python-docx, returning None for now
-            return None
-        else:
-            # Try to decode as text for unknown types
-            try:
-                return content.decode("utf-8", errors="ignore")
-            except Exception:
-                return None
+            return self.extract_text_from_pdf(content, max_chars=max_chars)
+        # Plain text, and a best-effort decode for unknown types. Callers cut the
+        # text at max_chars, so only decode enough bytes to exceed it (a UTF-8
+        # char is at most 4 bytes); the memoryview slice avoids a copy.
+        if max_chars is not None:
+            return str(memoryview(content)[:max_chars * 4 + 4], "utf-8", "ignore")
+        return content.decode("utf-8", errors="ignore")
 
     def get_file_summary_context(self, file_info: Dict) -> str:
         """Get context string about a file for summarization."""
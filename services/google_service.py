@@ -1,6 +1,7 @@
 import os
+import threading
 from datetime import datetime
-from typing import Optional, Dict
+from typing import Optional, Dict, Any
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 from google_auth_oauthlib.flow import Flow
@@ -8,6 +9,7 @@ from googleapiclient.discovery import build
 
 from config import Config
 from database import save_google_token, get_google_token
+from utils import TTLCache
 
 SCOPES = [
     "https://www.googleapis.com/auth/documents",
@@ -18,6 +20,22 @@ SCOPES = [
 class GoogleService:
     """Service for interacting with Google Docs and Drive."""
 
+    # (api, version, user, credentials, thread) -> built API client. build()
+    # parses a large discovery document into a Resource tree; the thread is part
+    # of the key because the httplib2 transport underneath isn't thread-safe.
+    # Keying on the Credentials object means a reconnect or token reload gets a
+    # fresh client; each cached client holds its Credentials, so the id can't be
+    # reused while the entry lives. Entries expire around when the access token
+    # they were built with does.
+    _service_cache = TTLCache(ttl=50 * 60, maxsize=256)
+    # user -> Credentials, so auth checks on every command skip the token lookup
+    _credentials_cache = TTLCache(ttl=10 * 60, maxsize=256)
+
+    @classmethod
+    def forget_credentials(cls, user_id: str):
+        """Drop a user's cached credentials, e.g. after their tokens change."""
+        cls._credentials_cache.pop(user_id)
+
     def __init__(self):
         self.client_config = {
             "web": {
@@ -61,6 +79,7 @@ class GoogleService:
                 refresh_token=credentials.refresh_token,
                 expiry=credentials.expiry
             )
+            self.forget_credentials(user_id)
             return True
         except Exception as e:
             print(f"OAuth callback error: {e}")
@@ -68,6 +87,10 @@ class GoogleService:
 
     def get_credentials(self, user_id: str) -> Optional[Credentials]:
         """Get valid credentials for a user, refreshing if needed."""
+        credentials = self._credentials_cache.get(user_id)
+        if credentials is not None and not credentials.expired:
+            return credentials
+
         token_data = get_google_token(user_id)
         if not token_data:
             return None
@@ -89,17 +112,30 @@ class GoogleService:
                 expiry=credentials.expiry
             )
 
+        self._credentials_cache.set(user_id, credentials)
         return credentials
 
-    def create_document(self, user_id: str, title: str, content: str) -> Optional[Dict]:
-        """Create a new Google Doc with the given content."""
+    def _get_service(self, user_id: str, api: str, version: str) -> Optional[Any]:
+        """Get a built API client for a user, reusing one from this thread when possible."""
         credentials = self.get_credentials(user_id)
         if not credentials:
             return None
 
+        key = (api, version, user_id, id(credentials), threading.get_ident())
+        service = self._service_cache.get(key)
+        if service is None:
+            # The client library bundles discovery documents, so no fetch is needed
+            service = build(api, version, credentials=credentials, static_discovery=True)
+            self._service_cache.set(key, service)
+        return service
+
+    def create_document(self, user_id: str, title: str, content: str) -> Optional[Dict]:
+        """Create a new Google Doc with the given content."""
+        docs_service = self._get_service(user_id, "docs", "v1")
+        if not docs_service:
+            return None
+
         try:
-            docs_service = build("docs", "v1", credentials=credentials)
-            drive_service = build("drive", "v3", credentials=credentials)
 
             # Create empty document
             doc = docs_service.documents().create(body={"title": title}).execute()
@@ -152,12 +188,11 @@ class GoogleService:
 
     def append_to_document(self, user_id: str, document_id: str, content: str) -> bool:
         """Append content to an existing document."""
-        credentials = self.get_credentials(user_id)
-        if not credentials:
+        docs_service = self._get_service(user_id, "docs", "v1")
+        if not docs_service:
             return False
 
         try:
-            docs_service = build("docs", "v1", credentials=credentials)
 
             # Get current document length
             doc = docs_service.documents().get(documentId=document_id).execute()
@@ -1,21 +1,38 @@
-from typing import Optional, List, Dict
-from anthropic import Anthropic
-from tavily import TavilyClient
+import functools
+from typing import Optional, List, Dict, TYPE_CHECKING
 
 from config import Config
+from services.anthropic_client import get_anthropic_client
+
+if TYPE_CHECKING:
+    from anthropic import Anthropic
+    from tavily import TavilyClient
 
 
 class ResearchService:
     """Service for research queries using Claude with Tavily web search."""
 
     def __init__(self):
-        self.anthropic = Anthropic(api_key=Config.ANTHROPIC_API_KEY)
-        self.tavily = TavilyClient(api_key=Config.TAVILY_API_KEY) if Config.TAVILY_API_KEY else None
+        # Clients are built on first use; the service is created at startup but
+        # many processes never run a web search
         self.model = "claude-sonnet-4-20250514"
 
+    @functools.cached_property
+    def anthropic(self) -> "Anthropic":
+        """Shared Anthropic client, fetched on first use."""
+        return get_anthropic_client()
+
+    @functools.cached_property
+    def tavily(self) -> Optional["TavilyClient"]:
+        """Tavily client, built on first use; None when no API key is set."""
+        if not Config.TAVILY_API_KEY:
+            return None
+        from tavily import TavilyClient
+        return TavilyClient(api_key=Config.TAVILY_API_KEY)
+
     def is_available(self) -> bool:
         """Check if research service is available."""
-        return self.tavily is not None
+        return bool(Config.TAVILY_API_KEY)
 
     def search(self, query: str) -> str:
         """Perform a web search using Tavily."""
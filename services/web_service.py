@@ -1,17 +1,57 @@
+import functools
+import io
 import re
 import requests
 from typing import Optional
 from html.parser import HTMLParser
 
+from utils import create_http_session
+
+try:
+    # Lexbor-backed C parser; much faster than html.parser on large pages
+    from selectolax.parser import HTMLParser as LexborParser
+except ImportError:
+    LexborParser = None
+
+# Elements whose text is never page content
+_SKIP_TAGS = ('script', 'style', 'noscript', 'header', 'footer', 'nav')
+
+# Bodies fetch_url will read; anything else (PDFs, video, installers) is
+# skipped before the body is downloaded
+_TEXT_CONTENT_TYPES = ('text/', 'application/json', 'application/xhtml+xml', 'application/xml')
+# Largest body fetch_url reads; longer pages are cut off at this size
+MAX_FETCH_BYTES = 5 * 1024 * 1024
+
+# One pass over the text for both Slack's <url|label> format and plain URLs
+_URL_RE = re.compile(r'<(?P<slack>https?://[^|>]+)(?:\|[^>]+)?>|(?<!<)(?P<plain>https?://[^\s<>]+)')
+# Whitespace is collapsed by mapping every whitespace char to a space in C,
+# then squeezing space runs; same result as re.sub(r'\s+', ' ', ...) but the
+# regex only has to stop at spaces
+_WHITESPACE_TO_SPACE = str.maketrans(dict.fromkeys(
+    # Every char str.isspace() accepts, other than ' ' itself
+    '\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f\x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004'
+    '\u2005\u2006\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000',
+    ' '
+))
+_SPACE_RUN_RE = re.compile(r' {2,}')
+_TITLE_RE = re.compile(r'<title[^>]*>([^<]+)</title>', re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=2048)
+def _extract_urls(text: str) -> tuple:
+    """Extract URLs from text, memoized since thread parents are re-scanned per reply."""
+    # Deduplicated, in the order they appear
+    return tuple(dict.fromkeys(m.group('slack') or m.group('plain') for m in _URL_RE.finditer(text)))
+
 
 class HTMLTextExtractor(HTMLParser):
     """Extract text content from HTML, ignoring scripts and styles."""
 
     def __init__(self):
         super().__init__()
-        self.text_parts = []
+        self._buf = io.StringIO()
         self.skip_data = False
-        self.skip_tags = {'script', 'style', 'noscript', 'header', 'footer', 'nav'}
+        self.skip_tags = set(_SKIP_TAGS)
 
     def handle_starttag(self, tag, attrs):
         if tag in self.skip_tags:
@@ -22,13 +62,13 @@ class HTMLTextExtractor(HTMLParser):
             self.skip_data = False
 
     def handle_data(self, data):
+        # Kept raw; _extract_text_from_html collapses all whitespace in one pass
         if not self.skip_data:
-            text = data.strip()
-            if text:
-                self.text_parts.append(text)
+            self._buf.write(data)
+            self._buf.write(' ')
 
     def get_text(self):
-        return ' '.join(self.text_parts)
+        return self._buf.getvalue()
 
 
 class WebService:
@@ -40,24 +80,39 @@ class WebService:
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
         }
+        # Reused across fetches so repeat hosts skip the TCP/TLS handshake
+        self.session = create_http_session()
 
     def fetch_url(self, url: str) -> Optional[str]:
         """Fetch content from a URL and return the text."""
         try:
-            response = requests.get(url, headers=self.headers, timeout=15)
-            response.raise_for_status()
-
-            content_type = response.headers.get('content-type', '').lower()
-
-            if 'text/html' in content_type:
-                return self._extract_text_from_html(response.text)
-            elif 'text/plain' in content_type:
-                return response.text
-            elif 'application/json' in content_type:
-                return response.text
-            else:
-                # Try to extract as HTML anyway
-                return self._extract_text_from_html(response.text)
+            # Streamed, so the headers can be checked before any body is read
+            with self.session.get(url, headers=self.headers, timeout=15, stream=True) as response:
+                response.raise_for_status()
+
+                content_type = response.headers.get('content-type', '').lower()
+                if content_type and not content_type.startswith(_TEXT_CONTENT_TYPES):
+                    print(f"Skipping non-text URL {url} ({content_type})")
+                    return None
+
+                content_length = response.headers.get('content-length', '')
+                if content_length.isdigit() and int(content_length) > MAX_FETCH_BYTES:
+                    print(f"Skipping oversized URL {url} ({content_length} bytes)")
+                    return None
+
+                # Stop at the cap even when the server didn't send a length
+                body = bytearray()
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    body += chunk
+                    if len(body) >= MAX_FETCH_BYTES:
+                        del body[MAX_FETCH_BYTES:]
+                        break
+                text = body.decode(response.encoding or 'utf-8', errors='replace')
+
+            if 'text/plain' in content_type or 'application/json' in content_type:
+                return text
+            # HTML, and anything else text-like: extract as HTML
+            return self._extract_text_from_html(text)
 
         except requests.exceptions.Timeout:
             print(f"Timeout fetching URL: {url}")
@@ -68,34 +123,29 @@ class WebService:
 
     def _extract_text_from_html(self, html: str) -> str:
         """Extract readable text from HTML content."""
-        # First try to get the main content
-        parser = HTMLTextExtractor()
-        parser.feed(html)
-        text = parser.get_text()
+        if LexborParser is not None:
+            tree = LexborParser(html)
+            for node in tree.css(','.join(_SKIP_TAGS)):
+                node.decompose()
+            root = tree.body or tree.root
+            text = root.text(separator=' ') if root else ''
+        else:
+            parser = HTMLTextExtractor()
+            parser.feed(html)
+            text = parser.get_text()
 
         # Clean up whitespace
-        text = re.sub(r'\s+', ' ', text)
+        text = _SPACE_RUN_RE.sub(' ', text.translate(_WHITESPACE_TO_SPACE))
 
         return text.strip()
 
     def extract_urls_from_text(self, text: str) -> list:
         """Extract URLs from text."""
-        # Match URLs including those in Slack's format <url|label>
-        slack_url_pattern = r'<(https?://[^|>]+)(?:\|[^>]+)?>'
-        slack_urls = re.findall(slack_url_pattern, text)
-
-        # Also match plain URLs
-        plain_url_pattern = r'(?<!<)(https?://[^\s<>]+)'
-        plain_urls = re.findall(plain_url_pattern, text)
-
-        # Combine and deduplicate
-        all_urls = list(dict.fromkeys(slack_urls + plain_urls))
-
-        return all_urls
+        return list(_extract_urls(text))
 
     def get_page_title(self, html: str) -> Optional[str]:
         """Extract page title from HTML."""
-        match = re.search(r'<title[^>]*>([^<]+)</title>', html, re.IGNORECASE)
+        match = _TITLE_RE.search(html)
         if match:
             return match.group(1).strip()
         return None
@@ -0,0 +1,16 @@
+import queue
+
+import pytest
+
+import database
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A fresh, initialized database with its own connection pool."""
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "pillar_bot.db")
+    monkeypatch.setattr(database, "_pool", queue.LifoQueue(maxsize=database.POOL_SIZE))
+    database.init_db()
+    yield database
+    while not database._pool.empty():
+        database._pool.get_nowait().close()
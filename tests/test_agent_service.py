@@ -0,0 +1,65 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from services import agent_service
+from services.agent_service import AgentService
+
+
+def _tool_use(name, tool_id):
+    return SimpleNamespace(name=name, id=tool_id, input={"id": tool_id})
+
+
+def test_stateful_tools_run_in_order_alongside_fetches(monkeypatch):
+    monkeypatch.setattr(agent_service, "get_anthropic_client", lambda: None)
+    agent = AgentService()
+
+    history_loaded = threading.Event()
+    fetch_started = threading.Event()
+
+    def get_channel_history(tool_input, context):
+        time.sleep(0.05)
+        history_loaded.set()
+        return "history"
+
+    def read_file_by_name(tool_input, context):
+        return "found" if history_loaded.is_set() else "missing"
+
+    def fetch_url(tool_input, context):
+        fetch_started.set()
+        return "page"
+
+    executors = {
+        "get_channel_history": get_channel_history,
+        "read_file_by_name": read_file_by_name,
+        "fetch_url": fetch_url,
+    }
+    tool_uses = [
+        _tool_use("get_channel_history", "1"),
+        _tool_use("fetch_url", "2"),
+        _tool_use("read_file_by_name", "3"),
+    ]
+
+    results = agent._execute_step_tools(tool_uses, executors, {}, {})
+
+    assert results == ["history", "page", "found"]
+    assert fetch_started.is_set()
+
+
+def test_add_to_agenda_invalidates_view_from_same_step(monkeypatch):
+    monkeypatch.setattr(agent_service, "get_anthropic_client", lambda: None)
+    agent = AgentService()
+
+    agenda = []
+    executors = {
+        "view_agenda": lambda tool_input, context: ", ".join(agenda) or "empty",
+        "add_to_agenda": lambda tool_input, context: agenda.append("item") or "added",
+    }
+    tool_cache = {}
+
+    agent._execute_step_tools(
+        [_tool_use("view_agenda", "1"), _tool_use("add_to_agenda", "2")], executors, {}, tool_cache
+    )
+    view_again = SimpleNamespace(name="view_agenda", id="3", input={"id": "1"})
+
+    assert agent._execute_step_tools([view_again], executors, {}, tool_cache) == ["item"]
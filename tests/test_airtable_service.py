@@ -0,0 +1,51 @@
+import pytest
+
+from services.airtable_service import AirtableService
+
+
+class FakeTable:
+    """In-memory stand-in for the Portfolio Companies table."""
+
+    def __init__(self):
+        self.records = {"rec1": {"id": "rec1", "fields": {"Name": "Acme", "Notes": "Seed"}}}
+
+    def all(self, fields=None, formula=None):
+        return [dict(record, fields=dict(record["fields"])) for record in self.records.values()]
+
+    def get(self, record_id):
+        return self.all()[0]
+
+    def first(self, formula=None, fields=None):
+        return self.all()[0]
+
+    def update(self, record_id, fields):
+        self.records[record_id]["fields"].update(fields)
+
+
+@pytest.fixture
+def airtable(monkeypatch):
+    for cache in (AirtableService._company_cache, AirtableService._company_list_cache,
+                  AirtableService._record_id_cache):
+        cache.clear()
+    table = FakeTable()
+    service = AirtableService()
+    monkeypatch.setattr(service, "_get_table", lambda table_name: table)
+    return service
+
+
+def test_update_company_notes_refreshes_company_listing(airtable):
+    assert airtable.get_all_portfolio_companies()[0]["notes"] == "Seed"
+
+    assert airtable.update_company_notes("Acme", "Raised A")
+
+    assert airtable.get_all_portfolio_companies()[0]["notes"] == "Seed\n\n---\nRaised A"
+    assert airtable.get_portfolio_company("acme")["notes"] == "Seed\n\n---\nRaised A"
+
+
+def test_cached_companies_are_returned_as_copies(airtable):
+    airtable.get_all_portfolio_companies()[0]["notes"] = "edited by a caller"
+    airtable.get_portfolio_company("Acme")["stage"] = "edited by a caller"
+
+    company = airtable.get_all_portfolio_companies()[0]
+    assert company["notes"] == "Seed"
+    assert company["stage"] is None
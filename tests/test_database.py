@@ -0,0 +1,31 @@
+from datetime import datetime
+
+
+def test_cache_summary_prunes_stale_rows(db):
+    start, end = datetime(2024, 1, 1, 9, 0), datetime(2024, 1, 2, 9, 0)
+    db.cache_summary("C_OLD", start, end, "old summary")
+    with db.connection() as conn:
+        with conn:
+            conn.execute("UPDATE summary_cache SET created_at = datetime('now', '-2 days')")
+
+    db.cache_summary("C_NEW", start, end, "new summary")
+
+    assert db.get_cached_summary("C_OLD", start, end) is None
+    assert db.get_cached_summary("C_NEW", start, end) == "new summary"
+
+
+def test_batched_last_active_keeps_newer_direct_write(db):
+    db.save_user_last_active("U1")
+    direct = db.get_user_last_active("U1")
+
+    db.save_users_last_active({"U1": datetime(2000, 1, 1), "U2": datetime(2000, 1, 1)})
+
+    assert db.get_user_last_active("U1") == direct
+    assert db.get_user_last_active("U2") == datetime(2000, 1, 1)
+
+
+def test_batched_last_active_advances_older_time(db):
+    db.save_users_last_active({"U1": datetime(2000, 1, 1)})
+    db.save_users_last_active({"U1": datetime(2001, 1, 1)})
+
+    assert db.get_user_last_active("U1") == datetime(2001, 1, 1)
@@ -0,0 +1,40 @@
+import re
+
+import pytest
+
+from utils import markdown_to_slack
+
+
+def _sequential_markdown_to_slack(text):
+    """The original chain of passes, which markdown_to_slack must keep matching."""
+    text = re.sub(r'\*\*(.+?)\*\*', r'*\1*', text)
+    text = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', r'<\2|\1>', text)
+    return re.sub(r'\*\*+', '*', text)
+
+
+@pytest.mark.parametrize("text", [
+    "x**y[**c**](http://y)",
+    "**see [docs](http://d)** now",
+    "[**bold link**](http://b)",
+    "**a** and [b](http://b) and **c**",
+    "***z*** [x](y)",
+    "[stray [real](http://r)",
+    "**unclosed [a](http://a)",
+    "plain prose only",
+])
+def test_bold_and_links_match_sequential_passes(text):
+    assert markdown_to_slack(text) == _sequential_markdown_to_slack(text)
+
+
+def test_stray_bold_before_link_still_converts_link():
+    assert markdown_to_slack("x**y[**c**](http://y)") == "x*y<http://y|*c*>"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("# Title", "*Title*"),
+    ("### Deep **bold**", "*Deep *bold*"),
+    ("## Trailing  ", "*Trailing*"),
+    ("#\nnot a header", "#\nnot a header"),
+])
+def test_headers(text, expected):
+    assert markdown_to_slack(text) == expected
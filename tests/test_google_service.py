@@ -0,0 +1,18 @@
+from services import google_service
+from services.google_service import GoogleService
+
+
+def test_reconnect_rebuilds_cached_docs_client(monkeypatch):
+    tokens = {"access_token": "old", "refresh_token": "refresh", "token_expiry": None}
+    monkeypatch.setattr(google_service, "get_google_token", lambda user_id: dict(tokens))
+    monkeypatch.setattr(google_service, "build", lambda *args, **kwargs: kwargs["credentials"])
+    google = GoogleService()
+
+    first = google._get_service("U_RECONNECT", "docs", "v1")
+    assert google._get_service("U_RECONNECT", "docs", "v1") is first
+
+    # What the OAuth callback does after storing the new tokens
+    tokens["access_token"] = "new"
+    GoogleService.forget_credentials("U_RECONNECT")
+
+    assert google._get_service("U_RECONNECT", "docs", "v1").token == "new"
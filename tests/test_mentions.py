@@ -0,0 +1,95 @@
+from handlers.mentions import _ReplyStreamer, build_tool_executors
+from utils import HistoryMessage
+
+
+class StubSlackUtils:
+    """Just enough of SlackUtils for the history-backed tools."""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.history_calls = []
+
+    def get_channel_history(self, channel_id, hours=None, since=None, limit=None):
+        self.history_calls.append((channel_id, hours))
+        return self.messages
+
+    def get_channel_id_by_name(self, channel_name):
+        return "C_PORTFOLIO" if channel_name == "portfolio-acme" else None
+
+
+def _message(text, ts="1700000000.000100", files=None):
+    return HistoryMessage(
+        user="U1", user_name="Ann", text=text, timestamp="2023-11-14 22:13", ts=ts, files=files or [],
+    )
+
+
+def _executors(slack_utils):
+    return build_tool_executors(None, None, None, None, slack_utils)
+
+
+def test_get_channel_history_fetches_through_slack_utils():
+    slack_utils = StubSlackUtils([_message("hello", files=[{"name": "deck.pdf"}])])
+    executors = _executors(slack_utils)
+
+    result = executors["get_channel_history"]({"hours": 48}, {"channel_id": "C1"})
+
+    assert result == "[2023-11-14 22:13] Ann: hello [Files: deck.pdf]"
+    assert slack_utils.history_calls == [("C1", 48)]
+
+
+def test_get_channel_history_reuses_a_wider_window():
+    slack_utils = StubSlackUtils([_message("hello")])
+    executors = _executors(slack_utils)
+
+    executors["get_channel_history"]({"hours": 168}, {"channel_id": "C1"})
+    executors["get_channel_history"]({"hours": 168}, {"channel_id": "C1"})
+
+    assert slack_utils.history_calls == [("C1", 168)]
+
+
+def test_get_portfolio_company_channel_reads_history():
+    slack_utils = StubSlackUtils([_message("closed the round")])
+    executors = _executors(slack_utils)
+
+    result = executors["get_portfolio_company_channel"]({"company_name": "Acme"}, {})
+
+    assert result == "Recent messages from #portfolio-acme:\n[2023-11-14 22:13] Ann: closed the round"
+    assert slack_utils.history_calls == [("C_PORTFOLIO", 168)]
+
+
+class FakeSlackClient:
+    """Records the chat calls a streamed reply makes."""
+
+    def __init__(self):
+        self.calls = []
+
+    def chat_postMessage(self, channel, thread_ts, text):
+        self.calls.append(("post", text))
+        return {"ts": f"ts{len(self.calls)}"}
+
+    def chat_update(self, channel, ts, text):
+        self.calls.append(("update", ts, text))
+
+    def chat_delete(self, channel, ts):
+        self.calls.append(("delete", ts))
+
+
+def test_reply_streamer_drops_the_draft_of_a_tool_step():
+    client = FakeSlackClient()
+    streamer = _ReplyStreamer(client, "C1", "1.0", before_first_post=lambda: None)
+    streamer.start()
+
+    streamer.on_text("Let me check the channel...")
+    streamer._flush()
+    streamer.discard()
+    streamer._flush()
+    streamer.on_text("Here is the answer")
+    streamer._flush()
+
+    assert streamer.finish("Here is the answer")
+    assert client.calls == [
+        ("post", "Let me check the channel..."),
+        ("delete", "ts1"),
+        ("post", "Here is the answer"),
+        ("update", "ts3", "Here is the answer"),
+    ]
@@ -0,0 +1,30 @@
+import pytest
+
+from utils import SlackUtils
+
+
+@pytest.mark.parametrize("text, hours", [
+    ("7d", 168),
+    ("24h", 24),
+    ("1 week", 168),
+    ("2 days", 48),
+    ("Today", 24),
+    ("this week", 168),
+    ("yesterday", 48),
+    ("no period here", None),
+])
+def test_parse_time_period(text, hours):
+    assert SlackUtils(client=object()).parse_time_period(text) == hours
+
+
+@pytest.mark.parametrize("text, hours", [
+    # Days are preferred over any other unit, wherever they appear
+    ("1 week 2 days", 48),
+    ("12h 3d", 72),
+    # Then hours, then weeks, then the named periods
+    ("2 weeks 6 hours", 6),
+    ("this week, last 2 weeks", 336),
+    ("yesterday and today", 24),
+])
+def test_parse_time_period_mixed_units(text, hours):
+    assert SlackUtils(client=object()).parse_time_period(text) == hours
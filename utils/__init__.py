@@ -1,4 +1,6 @@
-from .slack_utils import SlackUtils
+from .slack_utils import SlackUtils, HistoryMessage, create_web_client
 from .formatters import MessageFormatter, markdown_to_slack
+from .cache import TTLCache
+from .http import create_http_session
 
-__all__ = ["SlackUtils", "MessageFormatter", "markdown_to_slack"]
+__all__ = ["SlackUtils", "HistoryMessage", "create_web_client", "MessageFormatter", "markdown_to_slack", "TTLCache", "create_http_session"]
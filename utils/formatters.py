@@ -1,6 +1,14 @@
 import re
+import functools
 from datetime import datetime
 
+# Headers stay on their own line and lose trailing blanks, which would
+# otherwise keep Slack from rendering the bold
+_HEADER_RE = re.compile(r'^#{1,3}[ \t]+(.+?)[ \t]*$', re.MULTILINE)
+_BOLD_RE = re.compile(r'\*\*(.+?)\*\*')
+_LINK_RE = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
+_DOUBLE_STAR_RE = re.compile(r'\*\*+')
+
 
 def markdown_to_slack(text: str) -> str:
     """Convert standard Markdown to Slack's mrkdwn format.
@@ -11,25 +19,145 @@ def markdown_to_slack(text: str) -> str:
     - No headers - use bold instead
     - Links: <url|text> (not [text](url))
     """
-    # Convert headers to bold (must do before other conversions)
-    # Handle ###, ##, # in that order
-    text = re.sub(r'^###\s+(.+)$', r'*\1*', text, flags=re.MULTILINE)
-    text = re.sub(r'^##\s+(.+)$', r'*\1*', text, flags=re.MULTILINE)
-    text = re.sub(r'^#\s+(.+)$', r'*\1*', text, flags=re.MULTILINE)
+    # Plain prose has nothing for any pass to change
+    if "#" not in text and "**" not in text and "[" not in text:
+        return text
+
+    # Each pass works on the previous one's output, so a stray ** before a
+    # link is still followed by the link conversion
+    text = _HEADER_RE.sub(r'*\1*', text)
 
     # Convert **bold** to *bold* (Slack style)
     # Be careful not to affect already-correct *single asterisk* bold
-    text = re.sub(r'\*\*(.+?)\*\*', r'*\1*', text)
+    text = _BOLD_RE.sub(r'*\1*', text)
 
     # Convert markdown links [text](url) to Slack format <url|text>
-    text = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', r'<\2|\1>', text)
+    text = _LINK_RE.sub(r'<\2|\1>', text)
 
     # Convert `code` - Slack uses the same format, so this is fine
 
     # Clean up any double bold markers that might have been created
-    text = re.sub(r'\*\*+', '*', text)
+    return _DOUBLE_STAR_RE.sub('*', text)
+
+
+# Static payloads are built once at import; callers only unpack them into
+# respond()/say(), so the same dicts are safely shared across requests
+_AGENDA_PROMPT = {
+    "text": "Monday Meeting Agenda Builder",
+    "blocks": [
+        {
+            "type": "header",
+            "text": {
+                "type": "plain_text",
+                "text": "Monday Meeting Agenda Builder",
+            }
+        },
+        {
+            "type": "section",
+            "text": {
+                "type": "mrkdwn",
+                "text": "Add items to this week's agenda by selecting a category:"
+            }
+        },
+        {
+            "type": "actions",
+            "elements": [
+                {
+                    "type": "button",
+                    "text": {"type": "plain_text", "text": "Investment Decision"},
+                    "value": "investment_decision",
+                    "action_id": "agenda_investment"
+                },
+                {
+                    "type": "button",
+                    "text": {"type": "plain_text", "text": "Pipeline Update"},
+                    "value": "pipeline_update",
+                    "action_id": "agenda_pipeline"
+                },
+                {
+                    "type": "button",
+                    "text": {"type": "plain_text", "text": "Portfolio Update"},
+                    "value": "portfolio_update",
+                    "action_id": "agenda_portfolio"
+                },
+                {
+                    "type": "button",
+                    "text": {"type": "plain_text", "text": "Other"},
+                    "value": "other",
+                    "action_id": "agenda_other"
+                }
+            ]
+        },
+        {
+            "type": "context",
+            "elements": [
+                {
+                    "type": "mrkdwn",
+                    "text": "Or use `/pillar agenda add [category] [item]` to add directly"
+                }
+            ]
+        }
+    ]
+}
+
+_HELP = {
+    "text": "Pillar VC Bot Help",
+    "blocks": [
+        {
+            "type": "header",
+            "text": {
+                "type": "plain_text",
+                "text": "Pillar VC Bot - Help",
+            }
+        },
+        {
+            "type": "section",
+            "text": {
+                "type": "mrkdwn",
+                "text": "*Available Commands:*"
+            }
+        },
+        {
+            "type": "section",
+            "text": {
+                "type": "mrkdwn",
+                "text": (
+                    "`/pillar summarize [time]` - Summarize this channel (default: 24h)\n"
+                    "`/pillar catchup` - Personal catch-up since your last visit\n"
+                    "`/pillar actions [@user]` - Extract action items\n"
+                    "`/pillar agenda` - Start building Monday meeting agenda\n"
+                    "`/pillar agenda add [category] [item]` - Add item to agenda\n"
+                    "`/pillar agenda finalize` - Generate agenda Google Doc\n"
+                    "`/pillar portfolio [company]` - Get portfolio company update\n"
+                    "`/pillar lp-letter [quarter]` - Generate LP letter draft\n"
+                    "`/pillar help` - Show this help message"
+                )
+            }
+        },
+        {
+            "type": "divider"
+        },
+        {
+            "type": "section",
+            "text": {
+                "type": "mrkdwn",
+                "text": "*Mention Commands:*\nYou can also @mention me with natural language:\n"
+                       "- \"@PillarBot summarize the last week\"\n"
+                       "- \"@PillarBot what action items are there?\"\n"
+                       "- \"@PillarBot catch me up\""
+            }
+        }
+    ]
+}
+
 
-    return text
+_GOOGLE_AUTH_INTRO = {
+    "type": "section",
+    "text": {
+        "type": "mrkdwn",
+        "text": "To create Google Docs, I need access to your Google account."
+    }
+}
 
 
 class MessageFormatter:
@@ -40,6 +168,8 @@ class MessageFormatter:
         """Format a channel summary for Slack display."""
         # Convert markdown to Slack format
         summary = markdown_to_slack(summary)
+        # Slack block text limit; anything past the second block is dropped
+        head, tail = summary[:3000], summary[3000:6000]
 
         blocks = [
             {
@@ -65,18 +195,18 @@ class MessageFormatter:
                 "type": "section",
                 "text": {
                     "type": "mrkdwn",
-                    "text": summary[:3000]  # Slack block text limit
+                    "text": head
                 }
             }
         ]
 
         # Add continuation if summary is long
-        if len(summary) > 3000:
+        if tail:
             blocks.append({
                 "type": "section",
                 "text": {
                     "type": "mrkdwn",
-                    "text": summary[3000:6000]
+                    "text": tail
                 }
             })
 
@@ -148,65 +278,7 @@ class MessageFormatter:
     @staticmethod
     def format_agenda_prompt() -> dict:
         """Format the agenda collection prompt."""
-        blocks = [
-            {
-                "type": "header",
-                "text": {
-                    "type": "plain_text",
-                    "text": "Monday Meeting Agenda Builder",
-                }
-            },
-            {
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": "Add items to this week's agenda by selecting a category:"
-                }
-            },
-            {
-                "type": "actions",
-                "elements": [
-                    {
-                        "type": "button",
-                        "text": {"type": "plain_text", "text": "Investment Decision"},
-                        "value": "investment_decision",
-                        "action_id": "agenda_investment"
-                    },
-                    {
-                        "type": "button",
-                        "text": {"type": "plain_text", "text": "Pipeline Update"},
-                        "value": "pipeline_update",
-                        "action_id": "agenda_pipeline"
-                    },
-                    {
-                        "type": "button",
-                        "text": {"type": "plain_text", "text": "Portfolio Update"},
-                        "value": "portfolio_update",
-                        "action_id": "agenda_portfolio"
-                    },
-                    {
-                        "type": "button",
-                        "text": {"type": "plain_text", "text": "Other"},
-                        "value": "other",
-                        "action_id": "agenda_other"
-                    }
-                ]
-            },
-            {
-                "type": "context",
-                "elements": [
-                    {
-                        "type": "mrkdwn",
-                        "text": "Or use `/pillar agenda add [category] [item]` to add directly"
-                    }
-                ]
-            }
-        ]
-
-        return {
-            "text": "Monday Meeting Agenda Builder",
-            "blocks": blocks
-        }
+        return _AGENDA_PROMPT
 
     @staticmethod
     def format_google_doc_created(title: str, url: str) -> dict:
@@ -229,14 +301,9 @@ class MessageFormatter:
     @staticmethod
     def format_google_auth_prompt(auth_url: str) -> dict:
         """Format Google OAuth prompt."""
+        # Only the button's URL varies; the intro block is shared
         blocks = [
-            {
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": "To create Google Docs, I need access to your Google account."
-                }
-            },
+            _GOOGLE_AUTH_INTRO,
             {
                 "type": "actions",
                 "elements": [
@@ -306,59 +373,10 @@ class MessageFormatter:
     @staticmethod
     def format_help() -> dict:
         """Format help message."""
-        blocks = [
-            {
-                "type": "header",
-                "text": {
-                    "type": "plain_text",
-                    "text": "Pillar VC Bot - Help",
-                }
-            },
-            {
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": "*Available Commands:*"
-                }
-            },
-            {
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": (
-                        "`/pillar summarize [time]` - Summarize this channel (default: 24h)\n"
-                        "`/pillar catchup` - Personal catch-up since your last visit\n"
-                        "`/pillar actions [@user]` - Extract action items\n"
-                        "`/pillar agenda` - Start building Monday meeting agenda\n"
-                        "`/pillar agenda add [category] [item]` - Add item to agenda\n"
-                        "`/pillar agenda finalize` - Generate agenda Google Doc\n"
-                        "`/pillar portfolio [company]` - Get portfolio company update\n"
-                        "`/pillar lp-letter [quarter]` - Generate LP letter draft\n"
-                        "`/pillar help` - Show this help message"
-                    )
-                }
-            },
-            {
-                "type": "divider"
-            },
-            {
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": "*Mention Commands:*\nYou can also @mention me with natural language:\n"
-                           "- \"@PillarBot summarize the last week\"\n"
-                           "- \"@PillarBot what action items are there?\"\n"
-                           "- \"@PillarBot catch me up\""
-                }
-            }
-        ]
-
-        return {
-            "text": "Pillar VC Bot Help",
-            "blocks": blocks
-        }
+        return _HELP
 
     @staticmethod
+    @functools.lru_cache(maxsize=64)
     def format_error(message: str) -> dict:
         """Format error message."""
         return {
@@ -375,6 +393,7 @@ class MessageFormatter:
         }
 
     @staticmethod
+    @functools.lru_cache(maxsize=64)
     def format_loading(action: str) -> dict:
         """Format loading message."""
         return {
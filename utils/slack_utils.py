@@ -1,17 +1,104 @@
+import functools
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Tuple, Iterator
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
+from slack_sdk.http_retry.builtin_handlers import ConnectionErrorRetryHandler, RateLimitErrorRetryHandler
 
 from config import Config
+from .cache import TTLCache
+
+_USER_MENTION_RE = re.compile(r'<@([A-Z0-9]+)>')
+_PARSE_USER_MENTION_RE = re.compile(r"<@(U[A-Z0-9]+)>")
+_CHANNEL_MENTION_RE = re.compile(r"<#(C[A-Z0-9]+)(?:\|[^>]+)?>")
+
+# Time periods like "7d", "24h", "1 week", "2 days". When a text holds more
+# than one, the unit listed first in _TIME_PERIOD_HOURS wins, wherever it is
+_TIME_PERIOD_RE = re.compile(
+    r"(?P<days>\d+)\s*d(?:ays?)?"
+    r"|(?P<hours>\d+)\s*h(?:ours?)?"
+    r"|(?P<weeks>\d+)\s*w(?:eeks?)?"
+    r"|(?P<today>today)"
+    r"|(?P<this_week>this week)"
+    r"|(?P<yesterday>yesterday)"
+)
+_TIME_PERIOD_HOURS = {
+    "days": lambda n: n * 24,
+    "hours": lambda n: n,
+    "weeks": lambda n: n * 24 * 7,
+    "today": lambda _: 24,
+    "this_week": lambda _: 24 * 7,
+    "yesterday": lambda _: 48,
+}
+_TIME_PERIOD_PRIORITY = {unit: rank for rank, unit in enumerate(_TIME_PERIOD_HOURS)}
+
+
+@functools.lru_cache(maxsize=4096)
+def _format_minute(minute: int) -> str:
+    """Format a minute since the epoch; a busy channel repeats the same few."""
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(minute * 60))
+
+
+# Membership changes, channel settings and integration posts carry nothing
+# worth summarizing
+_SKIP_HISTORY_SUBTYPES = frozenset({
+    "channel_join", "channel_leave", "channel_topic", "channel_purpose", "bot_message",
+})
+
+# Runs the users.list roster load alongside a history walk
+_roster_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="slack-roster")
+
+
+@dataclass(frozen=True, slots=True)
+class HistoryMessage:
+    """A Slack message as returned by the history and thread fetches."""
+    user: Optional[str]
+    user_name: str
+    text: str
+    timestamp: str
+    ts: str
+    files: List[Dict]
+    reactions: List[Dict] = field(default_factory=list)
+
+
+def create_web_client(token: str = None) -> WebClient:
+    """Create a WebClient that retries rate-limited calls after Slack's Retry-After."""
+    return WebClient(
+        token=token or Config.SLACK_BOT_TOKEN,
+        retry_handlers=[
+            ConnectionErrorRetryHandler(),
+            RateLimitErrorRetryHandler(max_retry_count=3),
+        ],
+    )
 
 
 class SlackUtils:
     """Utility functions for Slack operations."""
 
+    # Shared across instances so lookups survive the per-request SlackUtils objects
+    _user_cache = TTLCache(ttl=600, maxsize=10_000)
+    # Ids users.info failed on (deleted accounts, external users), kept briefly
+    # so a transient error doesn't hide a name for the full TTL
+    _unknown_user_cache = TTLCache(ttl=120, maxsize=1024)
+    # A cache miss loads the whole roster via users.list (one call per 1000
+    # users) rather than one users.info call per author, at most this often
+    USER_ROSTER_REFRESH_SECONDS = 600
+    _user_roster_loaded_at = float("-inf")
+    _user_roster_lock = threading.Lock()
+    # Channel names rarely change and renames/deletes are evicted by events
+    _channel_name_cache = TTLCache(ttl=24 * 60 * 60, maxsize=4096)
+    _channel_id_cache = TTLCache(ttl=24 * 60 * 60, maxsize=4096)
+    # The full conversations.list walk, as (id, name) pairs; channel events
+    # clear it, and the TTL covers changes the bot isn't told about
+    _channel_list_cache = TTLCache(ttl=300, maxsize=1)
+
     def __init__(self, client: WebClient = None):
-        self.client = client or WebClient(token=Config.SLACK_BOT_TOKEN)
-        self._user_cache = {}
+        self.client = client or create_web_client()
 
     def get_channel_history(
         self,
@@ -19,8 +106,21 @@ class SlackUtils:
         hours: int = None,
         since: datetime = None,
         limit: int = None
-    ) -> List[Dict]:
-        """Fetch channel message history."""
+    ) -> List[HistoryMessage]:
+        """Fetch channel message history, oldest first."""
+        messages = list(self.iter_channel_history(channel_id, hours=hours, since=since, limit=limit))
+        # Slack returns newest first; flip in place rather than copying
+        messages.reverse()
+        return messages
+
+    def iter_channel_history(
+        self,
+        channel_id: str,
+        hours: int = None,
+        since: datetime = None,
+        limit: int = None
+    ) -> Iterator[HistoryMessage]:
+        """Yield channel messages newest first, one page at a time."""
         if limit is None:
             limit = Config.MAX_MESSAGES_TO_FETCH
 
@@ -32,34 +132,37 @@ class SlackUtils:
         else:
             oldest = (datetime.now() - timedelta(hours=Config.DEFAULT_SUMMARY_HOURS)).timestamp()
 
-        messages = []
+        # Slack hands out history cursors one page at a time, so the pages can't
+        # be fetched in parallel. A cold name cache can be, though: load the
+        # roster while the first page is in flight
+        roster_loaded = None
+        if self._user_roster_stale():
+            roster_loaded = _roster_pool.submit(self._load_user_roster)
+
+        fetched = 0
         cursor = None
 
         try:
-            while len(messages) < limit:
+            while fetched < limit:
                 result = self.client.conversations_history(
                     channel=channel_id,
                     oldest=str(oldest),
-                    limit=min(200, limit - len(messages)),
+                    limit=min(200, limit - fetched),
                     cursor=cursor
                 )
 
-                for msg in result["messages"]:
-                    if msg.get("subtype") in ["channel_join", "channel_leave"]:
-                        continue
-
-                    user_name = self._get_user_name(msg.get("user", ""))
-                    # Resolve @mentions in the message text to actual names
-                    text = self.resolve_user_mentions(msg.get("text", ""))
-                    messages.append({
-                        "user": msg.get("user"),
-                        "user_name": user_name,
-                        "text": text,
-                        "timestamp": datetime.fromtimestamp(float(msg["ts"])).strftime("%Y-%m-%d %H:%M"),
-                        "ts": msg["ts"],
-                        "files": msg.get("files", []),
-                        "reactions": msg.get("reactions", []),
-                    })
+                # Drop channel noise before any name or mention lookups
+                page = [
+                    msg for msg in result["messages"]
+                    if msg.get("subtype") not in _SKIP_HISTORY_SUBTYPES
+                    and (msg.get("files") or msg.get("text", "").strip())
+                ]
+                fetched += len(page)
+
+                if roster_loaded:
+                    roster_loaded.result()
+                    roster_loaded = None
+                yield from self._to_history_messages(page)
 
                 if not result.get("has_more"):
                     break
@@ -68,10 +171,47 @@ class SlackUtils:
         except SlackApiError as e:
             print(f"Error fetching channel history: {e}")
 
-        # Return in chronological order (oldest first)
-        return list(reversed(messages))
+    def _to_history_messages(self, raw_messages: List[Dict]) -> List[HistoryMessage]:
+        """Convert raw Slack messages, resolving author names and @mentions."""
+        texts = self._resolve_mentions_bulk([msg.get("text", "") for msg in raw_messages])
+        # A handful of people write most of a page; look each author up once
+        author_names = {
+            user_id: self._get_user_name(user_id)
+            for user_id in {msg.get("user", "") for msg in raw_messages}
+        }
+        format_ts = self.format_ts
+        return [
+            HistoryMessage(
+                user=msg.get("user"),
+                user_name=author_names[msg.get("user", "")],
+                text=text,
+                timestamp=format_ts(msg["ts"]),
+                ts=msg["ts"],
+                files=msg.get("files", []),
+                reactions=msg.get("reactions", []),
+            )
+            for msg, text in zip(raw_messages, texts)
+        ]
+
+    @staticmethod
+    def format_ts(ts: str) -> str:
+        """Format a Slack message ts as local "YYYY-MM-DD HH:MM"."""
+        return _format_minute(int(float(ts) // 60))
+
+    def has_recent_activity(self, channel_id: str, since: datetime) -> bool:
+        """Check whether a channel has any messages since the given time."""
+        try:
+            result = self.client.conversations_history(
+                channel=channel_id,
+                oldest=str(since.timestamp()),
+                limit=1
+            )
+            return bool(result["messages"])
+        except SlackApiError as e:
+            print(f"Error checking channel activity: {e}")
+            return False
 
-    def get_thread_messages(self, channel_id: str, thread_ts: str) -> List[Dict]:
+    def get_thread_messages(self, channel_id: str, thread_ts: str) -> List[HistoryMessage]:
         """Fetch messages from a thread."""
         try:
             result = self.client.conversations_replies(
@@ -79,21 +219,7 @@ class SlackUtils:
                 ts=thread_ts,
                 limit=100
             )
-
-            messages = []
-            for msg in result["messages"]:
-                user_name = self._get_user_name(msg.get("user", ""))
-                text = self.resolve_user_mentions(msg.get("text", ""))
-                messages.append({
-                    "user": msg.get("user"),
-                    "user_name": user_name,
-                    "text": text,
-                    "timestamp": datetime.fromtimestamp(float(msg["ts"])).strftime("%Y-%m-%d %H:%M"),
-                    "ts": msg["ts"],
-                    "files": msg.get("files", []),
-                })
-            return messages
-
+            return self._to_history_messages(result["messages"])
         except SlackApiError as e:
             print(f"Error fetching thread: {e}")
             return []
@@ -103,94 +229,200 @@ class SlackUtils:
         if not user_id:
             return "Unknown"
 
-        if user_id in self._user_cache:
-            return self._user_cache[user_id]
+        name = self._user_cache.get(user_id)
+        if name is not None:
+            return name
+
+        if self._unknown_user_cache.get(user_id):
+            return user_id
+
+        if self._load_user_roster():
+            name = self._user_cache.get(user_id)
+            if name is not None:
+                return name
 
         try:
             result = self.client.users_info(user=user_id)
             user = result["user"]
             name = user.get("real_name") or user.get("name") or user_id
-            self._user_cache[user_id] = name
+            self._user_cache.set(user_id, name)
             return name
         except SlackApiError:
+            self._unknown_user_cache.set(user_id, True)
             return user_id
 
+    @classmethod
+    def _user_roster_stale(cls) -> bool:
+        """Whether the roster is due for another users.list load."""
+        return time.monotonic() - cls._user_roster_loaded_at >= cls.USER_ROSTER_REFRESH_SECONDS
+
+    def _load_user_roster(self) -> bool:
+        """Fill the user cache from users.list unless it was loaded recently.
+
+        Returns whether this call loaded it, so the caller knows a retry of the
+        cache could succeed.
+        """
+        if not self._user_roster_stale():
+            return False
+
+        with self._user_roster_lock:
+            # Another thread may have loaded it while this one waited
+            if not self._user_roster_stale():
+                return True
+            # Set up front so a failing users.list isn't retried on every miss
+            SlackUtils._user_roster_loaded_at = time.monotonic()
+
+            try:
+                cursor = None
+                while True:
+                    result = self.client.users_list(limit=1000, cursor=cursor)
+                    for user in result["members"]:
+                        name = user.get("real_name") or user.get("name") or user["id"]
+                        self._user_cache.set(user["id"], name)
+
+                    cursor = result.get("response_metadata", {}).get("next_cursor")
+                    if not cursor:
+                        break
+            except SlackApiError as e:
+                print(f"Error loading user roster: {e}")
+        return True
+
+    @classmethod
+    def forget_user(cls, user_id: str):
+        """Drop a user's cached name after their profile changes."""
+        cls._user_cache.pop(user_id)
+        cls._unknown_user_cache.pop(user_id)
+
     def resolve_user_mentions(self, text: str) -> str:
         """Replace <@USER_ID> mentions with actual user names."""
-        import re
+        # Most messages mention nobody; a substring check skips the regex
+        if "<@" not in text:
+            return text
+
+        # Replace <@U123ABC> patterns with @username
+        return _USER_MENTION_RE.sub(self._replace_mention, text)
+
+    def _replace_mention(self, match: re.Match) -> str:
+        """re.sub callback turning a <@USER_ID> match into @name."""
+        return f"@{self._get_user_name(match.group(1))}"
+
+    def _resolve_mentions_bulk(self, texts: List[str]) -> List[str]:
+        """Replace <@USER_ID> mentions across many texts, looking each user up once."""
+        user_ids = {
+            match.group(1)
+            for text in texts if "<@" in text
+            for match in _USER_MENTION_RE.finditer(text)
+        }
+        if not user_ids:
+            return texts
+
+        # The first miss loads the roster, so the rest are plain cache hits
+        names = {user_id: self._get_user_name(user_id) for user_id in user_ids}
 
         def replace_mention(match):
-            user_id = match.group(1)
-            user_name = self._get_user_name(user_id)
-            return f"@{user_name}"
+            return f"@{names[match.group(1)]}"
 
-        # Replace <@U123ABC> patterns with @username
-        return re.sub(r'<@([A-Z0-9]+)>', replace_mention, text)
+        return [
+            _USER_MENTION_RE.sub(replace_mention, text) if "<@" in text else text
+            for text in texts
+        ]
 
     def get_channel_name(self, channel_id: str) -> str:
         """Get channel name from channel ID."""
+        name = self._channel_name_cache.get(channel_id)
+        if name is not None:
+            return name
+
         try:
             result = self.client.conversations_info(channel=channel_id)
-            return result["channel"]["name"]
+            name = result["channel"]["name"]
+            self._channel_name_cache.set(channel_id, name)
+            return name
         except SlackApiError:
             return channel_id
 
+    @classmethod
+    def remember_channel(cls, channel_id: str, channel_name: str):
+        """Cache a channel's id/name pair, e.g. from a channel_created event."""
+        cls._channel_name_cache.set(channel_id, channel_name)
+        cls._channel_id_cache.set(channel_name, channel_id)
+        cls._channel_list_cache.clear()
+
+    @classmethod
+    def forget_channel(cls, channel_id: str):
+        """Drop a channel from the name caches after it is renamed or deleted."""
+        name = cls._channel_name_cache.pop(channel_id)
+        if name is not None:
+            cls._channel_id_cache.pop(name)
+        cls._channel_list_cache.clear()
+
     def get_channel_id_by_name(self, channel_name: str) -> Optional[str]:
         """Find channel ID by name."""
         # Remove # prefix if present
         channel_name = channel_name.lstrip("#")
 
+        channel_id = self._channel_id_cache.get(channel_name)
+        if channel_id is not None:
+            return channel_id
+
+        # Listing fills the id cache; a name still missing doesn't exist, and
+        # repeat misses within the list's TTL cost no API calls
+        self._list_channels()
+        return self._channel_id_cache.get(channel_name)
+
+    def _list_channels(self) -> List[Tuple[str, str]]:
+        """Get every channel as (id, name), from one paginated walk shared for a few minutes."""
+        channels = self._channel_list_cache.get("all")
+        if channels is not None:
+            return channels
+
+        channels = []
         try:
             cursor = None
             while True:
                 result = self.client.conversations_list(
                     types="public_channel,private_channel",
-                    limit=200,
+                    limit=1000,
                     cursor=cursor
                 )
 
                 for channel in result["channels"]:
-                    if channel["name"] == channel_name:
-                        return channel["id"]
+                    channels.append((channel["id"], channel["name"]))
+                    self._channel_name_cache.set(channel["id"], channel["name"])
+                    self._channel_id_cache.set(channel["name"], channel["id"])
 
                 if not result.get("has_more"):
                     break
                 cursor = result.get("response_metadata", {}).get("next_cursor")
 
         except SlackApiError as e:
-            print(f"Error finding channel: {e}")
+            # A partial list isn't cached, so the next call retries
+            print(f"Error listing channels: {e}")
+            return channels
+
+        self._channel_list_cache.set("all", channels)
+        return channels
+
+    def preload_channel_names(self):
+        """Fill the channel name caches from conversations.list in one paginated walk."""
+        self._list_channels()
 
-        return None
+    @staticmethod
+    def portfolio_channel_name(company_name: str) -> str:
+        """Channel name a company gets under the portfolio naming convention."""
+        return f"{Config.PORTFOLIO_CHANNEL_PREFIX}{company_name.lower().replace(' ', '-')}"
 
     def get_portfolio_channels(self) -> List[Dict]:
         """Get all channels that match the portfolio channel prefix."""
         prefix = Config.PORTFOLIO_CHANNEL_PREFIX
         channels = []
-
-        try:
-            cursor = None
-            while True:
-                result = self.client.conversations_list(
-                    types="public_channel,private_channel",
-                    limit=200,
-                    cursor=cursor
-                )
-
-                for channel in result["channels"]:
-                    if channel["name"].startswith(prefix):
-                        company_name = channel["name"][len(prefix):].replace("-", " ").title()
-                        channels.append({
-                            "id": channel["id"],
-                            "name": channel["name"],
-                            "company_name": company_name,
-                        })
-
-                if not result.get("has_more"):
-                    break
-                cursor = result.get("response_metadata", {}).get("next_cursor")
-
-        except SlackApiError as e:
-            print(f"Error listing channels: {e}")
+        for channel_id, name in self._list_channels():
+            if name.startswith(prefix):
+                channels.append({
+                    "id": channel_id,
+                    "name": name,
+                    "company_name": name[len(prefix):].replace("-", " ").title(),
+                })
 
         return channels
 
@@ -260,34 +492,22 @@ class SlackUtils:
 
     def parse_user_mention(self, text: str) -> Optional[str]:
         """Extract user ID from a mention like <@U12345>."""
-        import re
-        match = re.search(r"<@(U[A-Z0-9]+)>", text)
+        match = _PARSE_USER_MENTION_RE.search(text)
         return match.group(1) if match else None
 
     def parse_channel_mention(self, text: str) -> Optional[str]:
         """Extract channel ID from a mention like <#C12345|channel-name>."""
-        import re
-        match = re.search(r"<#(C[A-Z0-9]+)(?:\|[^>]+)?>", text)
+        match = _CHANNEL_MENTION_RE.search(text)
         return match.group(1) if match else None
 
     def parse_time_period(self, text: str) -> Optional[int]:
         """Parse time period from text like '7d', '24h', '1 week'."""
-        import re
-
-        # Match patterns like "7d", "24h", "1 week", "2 days"
-        patterns = [
-            (r"(\d+)\s*d(?:ays?)?", lambda m: int(m.group(1)) * 24),
-            (r"(\d+)\s*h(?:ours?)?", lambda m: int(m.group(1))),
-            (r"(\d+)\s*w(?:eeks?)?", lambda m: int(m.group(1)) * 24 * 7),
-            (r"today", lambda m: 24),
-            (r"this week", lambda m: 24 * 7),
-            (r"yesterday", lambda m: 48),
-        ]
-
-        text_lower = text.lower()
-        for pattern, converter in patterns:
-            match = re.search(pattern, text_lower)
-            if match:
-                return converter(match)
+        match = None
+        for candidate in _TIME_PERIOD_RE.finditer(text.lower()):
+            if match is None or _TIME_PERIOD_PRIORITY[candidate.lastgroup] < _TIME_PERIOD_PRIORITY[match.lastgroup]:
+                match = candidate
+        if not match:
+            return None
 
-        return None
+        value = match.group(match.lastgroup)
+        return _TIME_PERIOD_HOURS[match.lastgroup](int(value) if value.isdigit() else None)